@@ -1,26 +1,36 @@
 # battery_manager.py
+import time
+from event_bus import bus, BatteryCharged, BatteryDischarged, BatteryInsufficient
+
 class BatteryManager:
-    def __init__(self, capacity_kwh=10):
+    def __init__(self, capacity_kwh=10, events=None):
         self.capacity_kwh = capacity_kwh
         self.charge_level = capacity_kwh  # kWh
+        self.events = bus if events is None else events
 
     def discharge(self, load_kw, duration_hours):
         energy_needed = load_kw * duration_hours
         if energy_needed <= self.charge_level:
             self.charge_level -= energy_needed
-            print(f"Battery discharged {energy_needed} kWh, remaining: {self.charge_level} kWh")
+            if self.events.active:
+                self.events.publish(BatteryDischarged(time.time(), energy_needed, self.charge_level))
             return True
         else:
-            print("Insufficient battery charge!")
+            if self.events.active:
+                self.events.publish(BatteryInsufficient(time.time(), energy_needed, self.charge_level))
             return False
 
     def charge(self, energy_kwh):
+        before = self.charge_level
         self.charge_level += energy_kwh
         if self.charge_level > self.capacity_kwh:
             self.charge_level = self.capacity_kwh
-        print(f"Battery charged to {self.charge_level} kWh")
+        if self.events.active:
+            self.events.publish(BatteryCharged(time.time(), self.charge_level - before, self.charge_level))
 
 if __name__ == "__main__":
+    from event_bus import ConsoleSink
+    bus.subscribe(ConsoleSink())
     battery = BatteryManager()
     battery.discharge(2, 1)
     battery.charge(1.5)
@@ -0,0 +1,113 @@
+# battery_fleet.py
+import time
+
+import numpy as np
+
+from event_bus import bus, BatteryCharged, BatteryDischarged, BatteryInsufficient
+
+class BatteryFleet:
+    """Capacity, charge level and power limits for many batteries in contiguous arrays"""
+
+    def __init__(self, capacity_kwh, charge_level=None, max_charge_kw=np.inf, max_discharge_kw=np.inf,
+                 count=None, events=None):
+        shape = (count,) if count is not None else np.shape(capacity_kwh)
+        self.capacity_kwh = np.array(np.broadcast_to(capacity_kwh, shape), dtype=np.float64)
+        # Full by default, like BatteryManager
+        self.charge_level = self.capacity_kwh.copy() if charge_level is None else \
+            np.array(np.broadcast_to(charge_level, shape), dtype=np.float64)
+        self.max_charge_kw = np.array(np.broadcast_to(max_charge_kw, shape), dtype=np.float64)
+        self.max_discharge_kw = np.array(np.broadcast_to(max_discharge_kw, shape), dtype=np.float64)
+        self._scratch = np.empty(shape)
+        # Only the per-battery views publish; fleet-wide steps would flood the bus
+        self.events = bus if events is None else events
+
+    def __len__(self):
+        return len(self.charge_level)
+
+    def __getitem__(self, index):
+        return BatteryView(self, index)
+
+    def soc(self):
+        return self.charge_level / self.capacity_kwh
+
+    def charge(self, energy_kwh, duration_hours=None):
+        """Add energy to every battery, clipped at capacity
+
+        With duration_hours, each battery also takes at most max_charge_kw for that long.
+        Returns the energy each battery absorbed.
+        """
+        before = self._scratch
+        np.copyto(before, self.charge_level)
+        if duration_hours is not None:
+            energy_kwh = np.minimum(energy_kwh, self.max_charge_kw * duration_hours)
+        np.add(self.charge_level, energy_kwh, out=self.charge_level)
+        np.minimum(self.charge_level, self.capacity_kwh, out=self.charge_level)
+        return self.charge_level - before
+
+    def discharge(self, load_kw, duration_hours):
+        """Run a load on every battery
+
+        A battery only discharges if it holds the energy and the load is within its
+        max_discharge_kw. Returns the per-battery success mask.
+        """
+        needed = np.multiply(load_kw, duration_hours, out=self._scratch)
+        ok = (needed <= self.charge_level) & (np.asarray(load_kw) <= self.max_discharge_kw)
+        np.subtract(self.charge_level, needed, out=self.charge_level, where=ok)
+        return ok
+
+class BatteryView:
+    """One battery of a fleet, with the BatteryManager interface"""
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def capacity_kwh(self):
+        return float(self.fleet.capacity_kwh[self.index])
+
+    @property
+    def charge_level(self):
+        return float(self.fleet.charge_level[self.index])
+
+    @charge_level.setter
+    def charge_level(self, value):
+        self.fleet.charge_level[self.index] = value
+
+    def discharge(self, load_kw, duration_hours):
+        energy_needed = load_kw * duration_hours
+        if energy_needed <= self.charge_level and load_kw <= self.fleet.max_discharge_kw[self.index]:
+            self.charge_level -= energy_needed
+            if self.fleet.events.active:
+                self.fleet.events.publish(BatteryDischarged(time.time(), energy_needed, self.charge_level))
+            return True
+        else:
+            if self.fleet.events.active:
+                self.fleet.events.publish(BatteryInsufficient(time.time(), energy_needed, self.charge_level))
+            return False
+
+    def charge(self, energy_kwh):
+        before = self.charge_level
+        charge_level = before + energy_kwh
+        if charge_level > self.capacity_kwh:
+            charge_level = self.capacity_kwh
+        self.charge_level = charge_level
+        if self.fleet.events.active:
+            self.fleet.events.publish(BatteryCharged(time.time(), charge_level - before, charge_level))
+
+if __name__ == "__main__":
+    from event_bus import ConsoleSink
+
+    bus.subscribe(ConsoleSink())
+    fleet = BatteryFleet(capacity_kwh=10, charge_level=5, max_discharge_kw=3, count=100_000)
+    rng = np.random.default_rng(0)
+    solar = rng.uniform(0, 0.5, len(fleet))
+    load = rng.uniform(0, 4, len(fleet))
+    start = time.perf_counter()
+    for _ in range(100):
+        fleet.charge(solar)
+        ok = fleet.discharge(load, 1 / 12)
+    elapsed = time.perf_counter() - start
+    print(f"{len(fleet)} batteries: {elapsed / 100 * 1000:.2f} ms per step, {ok.mean():.1%} of loads served")
+    fleet[0].discharge(2, 1)
+    fleet[0].charge(1.5)
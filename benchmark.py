@@ -0,0 +1,319 @@
+# benchmark.py
+"""Reproducible benchmarks for the control path and the edge services
+
+Every external service is replaced by the in-process stand-ins in standins.py, and
+every workload is seeded, so two runs on the same machine measure the same work.
+Results are written as stable JSON and can be compared against a stored baseline.
+"""
+import gc
+import io
+import json
+import logging
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+import standins
+
+# The benchmarks import battery_manager and solar_monitor by name
+standins.install_aliases()
+
+SCHEMA_VERSION = 1
+# Metrics compared against a baseline, by suffix; anything else is informational
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_us", "_ms")
+SIGNIFICANT_DIGITS = 4
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+def rounded(value):
+    if isinstance(value, float) and value:
+        return round(value, SIGNIFICANT_DIGITS - 1 - int(np.floor(np.log10(abs(value)))))
+    return value
+
+def sized(count, scale):
+    return max(1, int(count * scale))
+
+def rate(operation, count, rounds):
+    """Operations per second of the fastest of several rounds of count calls
+
+    Slower rounds measure interference from the rest of the machine, not the code,
+    so the best round is the most repeatable figure (as with timeit).
+    """
+    best = math.inf
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            operation(count)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return count / best
+
+def latencies_us(call, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1e6
+    return {"p50_us": float(np.percentile(samples, 50)), "p99_us": float(np.percentile(samples, 99))}
+
+def quiet_bus():
+    # A private bus with no subscribers, so nothing is queued or printed
+    from event_bus import EventBus
+    return EventBus()
+
+@benchmark("battery_steps")
+def bench_battery(scale, rounds):
+    from battery_manager import BatteryManager
+    from battery_fleet import BatteryFleet
+
+    battery = BatteryManager(capacity_kwh=10, events=quiet_bus())
+
+    def steps(count):
+        for _ in range(count):
+            battery.charge(0.05)
+            battery.discharge(1, 0.05)
+
+    fleet = BatteryFleet(np.full(10000, 10.0), events=quiet_bus())
+    solar = np.random.default_rng(0).uniform(0, 0.1, 10000)
+
+    def fleet_steps(count):
+        for _ in range(count):
+            fleet.charge(solar)
+            fleet.discharge(1, 0.05)
+
+    return {
+        "steps_per_sec": rate(steps, sized(200000, scale), rounds) * 2,
+        "fleet_battery_steps_per_sec": rate(fleet_steps, sized(1000, scale), rounds) * 2 * len(solar),
+    }
+
+@benchmark("schedule_task")
+def bench_schedule(scale, rounds):
+    from battery_manager import BatteryManager
+    from load_balancer import LoadBalancer
+
+    def admit(count):
+        balancer = LoadBalancer(BatteryManager(capacity_kwh=1e9, events=quiet_bus()), events=quiet_bus())
+        for _ in range(count):
+            balancer.schedule_task(1, 0.01)
+
+    def defer_and_drain(count):
+        # Below the reserve, every task is queued; one tick admits them once recharged
+        battery = BatteryManager(capacity_kwh=1e9, events=quiet_bus())
+        battery.charge_level = 0.5
+        balancer = LoadBalancer(battery, events=quiet_bus())
+        now = time.time()
+        for i in range(count):
+            balancer.schedule_task(1, 0.01, priority=('low', 'normal')[i % 2],
+                                   deadline=now + 3600 + i, deferrable=True)
+        battery.charge_level = battery.capacity_kwh
+        while balancer.pending:
+            balancer.tick(now)
+
+    return {
+        "admit_per_sec": rate(admit, sized(50000, scale), rounds),
+        "defer_and_tick_per_sec": rate(defer_and_drain, sized(20000, scale), rounds),
+    }
+
+@benchmark("dashboard_render")
+def bench_dashboard(scale, rounds):
+    from battery_manager import BatteryManager
+    from dashboard import Dashboard
+    from dashboard_server import SnapshotHub
+    from solar_monitor import SolarMonitor
+
+    dashboard = Dashboard(SolarMonitor(events=quiet_bus()), BatteryManager(events=quiet_bus()))
+
+    def render(count):
+        with redirect_stdout(io.StringIO()):
+            for _ in range(count):
+                dashboard.display_status()
+
+    def snapshot(count):
+        for _ in range(count):
+            dashboard.snapshot()
+
+    hub = SnapshotHub(dashboard)
+    clients = [hub.connect() for _ in range(50)]
+
+    def tick(count):
+        for _ in range(count):
+            hub.tick()
+            for client in clients:
+                client.get_nowait()
+
+    return {
+        "display_per_sec": rate(render, sized(10000, scale), rounds),
+        "snapshot_per_sec": rate(snapshot, sized(20000, scale), rounds),
+        "sse_tick_50_clients_per_sec": rate(tick, sized(500, scale), rounds),
+    }
+
+def bench_ml(interpreter, scale, rounds):
+    ml = standins.load_ml_service(interpreter)
+    standins.use_interpreter(ml, interpreter)
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    rows = rng.normal(size=(4096, 16)).astype(np.float32)
+    single = rows[0].tolist()
+    for _ in range(100):
+        ml.ml_service.predict(single)
+
+    def predict(count):
+        for _ in range(count):
+            ml.ml_service.predict(single)
+
+    def predict_many(count):
+        for _ in range(count):
+            ml.ml_service.predict_many(rows)
+
+    results = latencies_us(lambda: ml.ml_service.predict(single), sized(2000, scale))
+    results["predict_per_sec"] = rate(predict, sized(2000, scale), rounds)
+    results["rows_per_sec"] = rate(predict_many, sized(10, scale), rounds) * len(rows)
+    return results
+
+@benchmark("ml_predict_stub")
+def bench_ml_stub(scale, rounds):
+    """Service overhead around a model that does nothing"""
+    return bench_ml("stub", scale, rounds)
+
+@benchmark("ml_predict_model")
+def bench_ml_model(scale, rounds):
+    """The same path with a tiny real model doing the scoring"""
+    return bench_ml("model", scale, rounds)
+
+@benchmark("collector_msgs")
+def bench_collector(scale, rounds):
+    collector_module = standins.load_collector()
+    logging.getLogger().setLevel(logging.WARNING)
+    kinds = ("temperature", "humidity", "pressure", "vibration")
+    devices = 100
+    count = sized(20000, scale)
+    rng = np.random.default_rng(0)
+    values = rng.normal(20, 1, count).round(3)
+    messages = [(f"sensors/{kinds[i % 4]}/device-{i // 4 % devices}",
+                 json.dumps({kinds[i % 4]: values[i]}).encode()) for i in range(count)]
+
+    rates, dropped, forwarded = [], [], []
+    for _ in range(rounds):
+        collector = collector_module.IoTDataCollector()
+        collector.gate.random.seed(0)
+        thread = standins.start_collector(collector)
+        start = time.perf_counter()
+        for topic, payload in messages:
+            standins.broker.publish(topic, payload)
+        standins.wait_idle(collector)
+        rates.append(count / (time.perf_counter() - start))
+        standins.stop_collector(collector, thread)
+        dropped.append(collector.dropped)
+        forwarded.append(collector.enqueued)
+    return {
+        "msgs_per_sec": max(rates),
+        "forwarded": statistics.median(forwarded),
+        "dropped": max(dropped),
+    }
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+
+def run(names=None, quick=False):
+    # Quick runs do the same work at a tenth of the size
+    scale = 0.1 if quick else 1
+    rounds = 3 if quick else 5
+    report = {
+        "schema": SCHEMA_VERSION,
+        "environment": environment(),
+        "config": {"quick": quick, "rounds": rounds},
+        "results": {},
+    }
+    for name in names or BENCHMARKS:
+        random.seed(0)
+        np.random.seed(0)
+        results = BENCHMARKS[name](scale, rounds)
+        report["results"][name] = {metric: rounded(value) for metric, value in sorted(results.items())}
+    return report
+
+def direction(metric):
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+def compare(report, baseline, threshold=0.1):
+    """Metrics that moved by more than threshold; returns (rows, regressions)"""
+    rows = []
+    regressions = []
+    for name, results in report["results"].items():
+        for metric, value in results.items():
+            sign = direction(metric)
+            base = baseline.get("results", {}).get(name, {}).get(metric)
+            if not sign or not base:
+                continue
+            change = (value - base) / base
+            if sign * change < -threshold:
+                status = "REGRESSION"
+                regressions.append((name, metric))
+            elif sign * change > threshold:
+                status = "improved"
+            else:
+                status = "ok"
+            rows.append((name, metric, base, value, change, status))
+    return rows, regressions
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GreenEdge benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="smaller workloads, for CI smoke runs")
+    parser.add_argument("--save", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a saved JSON report")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change counted as a regression (default 0.1)")
+    args = parser.parse_args()
+
+    report = run(args.only, args.quick)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.save:
+        with open(args.save, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("schema") != SCHEMA_VERSION:
+            sys.exit(f"Baseline schema {baseline.get('schema')} does not match {SCHEMA_VERSION}")
+        if baseline.get("config") != report["config"]:
+            print(f"Warning: baseline was run with {baseline.get('config')}", file=sys.stderr)
+        rows, regressions = compare(report, baseline, args.threshold)
+        for name, metric, base, value, change, status in rows:
+            print(f"{name + '.' + metric:<48} {base:>12g} -> {value:>12g} {change:>+8.1%} {status}",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
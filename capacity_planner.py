@@ -0,0 +1,127 @@
+# capacity_planner.py
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulation import daylight_profile, simulate
+
+DEFAULT_MIXES = {
+    "light": {"load_kw": 0.15, "high_fraction": 0.1, "burst_kw": 0.0, "burst_probability": 0.0},
+    "steady": {"load_kw": 0.3, "high_fraction": 0.1, "burst_kw": 0.0, "burst_probability": 0.0},
+    "bursty": {"load_kw": 0.2, "high_fraction": 0.2, "burst_kw": 1.5, "burst_probability": 0.05},
+}
+PERCENTILES = (50, 90, 99)
+
+
+def weather_scenario(seed, days, step_seconds, peak_w_m2=1000):
+    """Irradiance trace with persistent multi-day cloud cover and intra-day flicker"""
+    rng = np.random.default_rng([seed, 0])
+    # Day-to-day cloudiness follows an AR(1) process so bad weather comes in runs
+    shocks = rng.normal(size=days)
+    weather = np.empty(days)
+    state = shocks[0]
+    for day in range(days):
+        state = 0.7 * state + math.sqrt(1 - 0.7 ** 2) * shocks[day]
+        weather[day] = state
+    clearness = 0.1 + 0.9 / (1 + np.exp(-1.5 * (weather + 0.5)))
+    profile = daylight_profile(step_seconds, peak_w_m2)
+    flicker = rng.uniform(0.85, 1.0, size=(days, len(profile)))
+    return (profile * clearness[:, None] * flicker).ravel()
+
+
+def workload_scenario(seed, steps, mix):
+    rng = np.random.default_rng([seed, 1])
+    load_kw = np.full(steps, mix["load_kw"])
+    if mix["burst_probability"]:
+        load_kw += np.where(rng.random(steps) < mix["burst_probability"], mix["burst_kw"], 0.0)
+    high_priority = rng.random(steps) < mix["high_fraction"]
+    return load_kw, high_priority
+
+
+def run_scenarios(job):
+    """Simulate one configuration over a block of seeds; runs in a worker process"""
+    battery_kwh, panel_w, mix, seeds, days, step_seconds = job
+    loss = np.empty(len(seeds))
+    unserved = np.empty(len(seeds))
+    for i, seed in enumerate(seeds):
+        # The same seed gives every configuration the same weather and workload
+        irradiance = weather_scenario(seed, days, step_seconds)
+        load_kw, high_priority = workload_scenario(seed, len(irradiance), mix)
+        result = simulate(irradiance, load_kw, step_seconds, panel_w=panel_w,
+                          capacity_kwh=battery_kwh, high_priority=high_priority)
+        summary = result.summary()
+        tasks = summary["tasks_accepted"] + summary["tasks_rejected"]
+        loss[i] = summary["tasks_rejected"] / tasks if tasks else 0.0
+        unserved[i] = summary["unserved_kwh"]
+    return loss, unserved
+
+
+def plan(battery_kwh, panel_w, mixes=None, scenarios=1000, days=30, step_seconds=300,
+         workers=None, seed=0):
+    """Sweep battery size, PV size and workload mix over randomized weather
+
+    Returns one row per configuration with the loss-of-load probability (the share of
+    task steps that could not be served) and percentiles of the per-scenario share of
+    deferred tasks.
+    """
+    mixes = DEFAULT_MIXES if mixes is None else mixes
+    workers = workers or os.cpu_count()
+    configs = list(itertools.product(battery_kwh, panel_w, mixes))
+    seeds = np.arange(seed, seed + scenarios)
+    # A few blocks per worker keeps processes busy without paying per-scenario IPC
+    blocks = np.array_split(seeds, min(scenarios, max(1, math.ceil(workers * 4 / len(configs)))))
+    jobs = [(battery, panel, mixes[mix], block.tolist(), days, step_seconds)
+            for battery, panel, mix in configs for block in blocks]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run_scenarios, jobs))
+
+    rows = []
+    for index, (battery, panel, mix) in enumerate(configs):
+        parts = results[index * len(blocks):(index + 1) * len(blocks)]
+        loss = np.concatenate([part[0] for part in parts])
+        unserved = np.concatenate([part[1] for part in parts])
+        row = {
+            "battery_kwh": battery,
+            "panel_w": panel,
+            "mix": mix,
+            "scenarios": len(loss),
+            "loss_of_load_probability": float(loss.mean()),
+            "any_loss_probability": float((loss > 0).mean()),
+            "unserved_kwh_mean": float(unserved.mean()),
+        }
+        for q, value in zip(PERCENTILES, np.percentile(loss * 100, PERCENTILES)):
+            row[f"deferred_pct_p{q}"] = float(value)
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Monte Carlo battery and PV sizing")
+    parser.add_argument("--battery-kwh", type=float, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--panel-w", type=float, nargs="+", default=[400, 800, 1600])
+    parser.add_argument("--mix", nargs="+", default=list(DEFAULT_MIXES), choices=list(DEFAULT_MIXES))
+    parser.add_argument("--scenarios", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--step-seconds", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = plan(args.battery_kwh, args.panel_w, {name: DEFAULT_MIXES[name] for name in args.mix},
+                args.scenarios, args.days, args.step_seconds, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'battery':>8} {'pv':>6} {'mix':>7} {'LOLP':>7} {'p50%':>6} {'p90%':>6} {'p99%':>6}")
+    for row in rows:
+        print(f"{row['battery_kwh']:>8g} {row['panel_w']:>6g} {row['mix']:>7} "
+              f"{row['loss_of_load_probability']:>7.3f} {row['deferred_pct_p50']:>6.1f} "
+              f"{row['deferred_pct_p90']:>6.1f} {row['deferred_pct_p99']:>6.1f}")
+    total = len(rows) * args.scenarios
+    print(f"{total} scenario runs in {elapsed:.1f} s")
@@ -0,0 +1,157 @@
+# control_loop.py
+import asyncio
+import bisect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the execution-time histogram buckets, in seconds
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+class PeriodicTask:
+    def __init__(self, name, callback, period, deadline=None, offset=0.0, in_thread=False):
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.deadline = period if deadline is None else deadline  # max execution time
+        self.offset = offset  # delay of the first run, to stagger tasks sharing a period
+        self.in_thread = in_thread  # run blocking callbacks in the default executor
+        self.runs = 0
+        self.overruns = 0  # runs that took longer than the deadline
+        self.missed = 0    # ticks skipped because a run was still going
+        self.errors = 0
+        self.histogram = Histogram()
+
+    def stats(self):
+        stats = {
+            "period": self.period,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "missed": self.missed,
+            "errors": self.errors,
+        }
+        stats.update(self.histogram.snapshot())
+        return stats
+
+class ControlLoop:
+    """Runs callbacks at fixed periods on one asyncio event loop
+
+    Ticks are scheduled from the loop's start time (start + offset + n * period), so a
+    slow run delays only its own next tick and timing never drifts. If a run outlasts
+    whole periods, those ticks are skipped and counted rather than run back to back.
+    """
+
+    def __init__(self):
+        self.tasks = []
+
+    def every(self, period, callback, name=None, deadline=None, offset=0.0, in_thread=False):
+        task = PeriodicTask(name or callback.__name__, callback, period, deadline, offset, in_thread)
+        self.tasks.append(task)
+        return task
+
+    async def _call(self, task):
+        if task.in_thread:
+            result = await asyncio.get_running_loop().run_in_executor(None, task.callback)
+        else:
+            result = task.callback()
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def _run(self, task, start):
+        loop = asyncio.get_running_loop()
+        next_tick = start + task.offset
+        while True:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            began = loop.time()
+            try:
+                await self._call(task)
+            except Exception:
+                task.errors += 1
+                logger.exception("Control task %s failed", task.name)
+            elapsed = loop.time() - began
+            task.runs += 1
+            task.histogram.observe(elapsed)
+            if elapsed > task.deadline:
+                task.overruns += 1
+            next_tick += task.period
+            behind = loop.time() - next_tick
+            if behind > 0:
+                skipped = int(behind // task.period) + 1
+                task.missed += skipped
+                next_tick += skipped * task.period
+
+    async def run(self, duration=None):
+        start = asyncio.get_running_loop().time()
+        runners = [asyncio.ensure_future(self._run(task, start)) for task in self.tasks]
+        try:
+            if duration is None:
+                await asyncio.gather(*runners)
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            for runner in runners:
+                runner.cancel()
+            await asyncio.gather(*runners, return_exceptions=True)
+
+    def stats(self):
+        return {task.name: task.stats() for task in self.tasks}
+
+if __name__ == "__main__":
+    def fast():
+        pass
+
+    def slow():
+        time.sleep(0.35)
+
+    async def sensing():
+        await asyncio.sleep(0.001)
+
+    control = ControlLoop()
+    control.every(0.05, fast)
+    control.every(0.1, sensing)
+    # Blocking work runs in a thread so it cannot hold up the other tasks
+    control.every(0.25, slow, deadline=0.3, in_thread=True)
+    asyncio.run(control.run(duration=2))
+    for name, stats in control.stats().items():
+        print(f"{name}: {stats['runs']} runs, {stats['overruns']} overruns, {stats['missed']} missed, "
+              f"p50 {stats['p50'] * 1000:.1f} ms, max {stats['max'] * 1000:.1f} ms")
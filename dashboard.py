@@ -1,14 +1,33 @@
 # dashboard.py
+import time
+
 class Dashboard:
-    def __init__(self, solar_monitor, battery_manager):
-        self.solar_monitor = solar_monitor
+    def __init__(self, solar_monitor, battery_manager, energy_monitor=None):
+        self.solar_monitor = solar_monitor  # SolarMonitor, or a SensorSampler to share its cached reading
         self.battery_manager = battery_manager
+        self.energy_monitor = energy_monitor  # optional EnergyMonitor, read from its last update
 
-    def display_status(self):
+    def snapshot(self):
+        """Current readings as a flat dict, one sensor read per call"""
         v, c, p = self.solar_monitor.read_sensors()
         charge = self.battery_manager.charge_level
-        print(f"Solar Power: {p} W (V: {v} V, I: {c} A)")
-        print(f"Battery Charge Level: {charge} kWh")
+        snapshot = {
+            "timestamp": time.time(),
+            "solar_power_w": p,
+            "solar_voltage_v": v,
+            "solar_current_a": c,
+            "battery_kwh": charge,
+            "battery_pct": round(charge / self.battery_manager.capacity_kwh * 100, 1),
+        }
+        if self.energy_monitor is not None and self.energy_monitor.latest:
+            snapshot.update(self.energy_monitor.latest)
+        return snapshot
+
+    def display_status(self):
+        snapshot = self.snapshot()
+        print(f"Solar Power: {snapshot['solar_power_w']} W (V: {snapshot['solar_voltage_v']} V, "
+              f"I: {snapshot['solar_current_a']} A)")
+        print(f"Battery Charge Level: {snapshot['battery_kwh']} kWh")
 
 if __name__ == "__main__":
     from solar_monitor import SolarMonitor
@@ -0,0 +1,214 @@
+# dashboard_server.py
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Output_data")
+# Messages a slow client may fall behind by before it is resynced with a full snapshot
+CLIENT_BACKLOG = 16
+KEEPALIVE_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+def host_metrics():
+    """CPU load, memory use, uptime and SoC temperature of this host, where /proc and /sys are available"""
+    metrics = {}
+    try:
+        metrics["cpu_pct"] = round(min(os.getloadavg()[0] / (os.cpu_count() or 1) * 100, 100), 1)
+    except (AttributeError, OSError):
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            info = {line.split(":")[0]: int(line.split()[1]) for line in f}
+        metrics["memory_pct"] = round((1 - info["MemAvailable"] / info["MemTotal"]) * 100, 1)
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        with open("/proc/uptime") as f:
+            metrics["uptime_s"] = int(float(f.read().split()[0]))
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open("/sys/class/thermal/thermal_zone0/temp") as f:
+            metrics["temperature_c"] = round(int(f.read()) / 1000, 1)
+    except (OSError, ValueError):
+        pass
+    return metrics
+
+def io_totals():
+    """Bytes moved so far over the network (every interface but lo) and to and from whole disks"""
+    totals = {}
+    try:
+        with open("/proc/net/dev") as f:
+            rows = [line.replace(":", " ").split() for line in f.readlines()[2:]]
+        totals["network"] = sum(int(row[1]) + int(row[9]) for row in rows if row[0] != "lo")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        # Partitions are listed too; counting only /sys/block devices avoids counting them twice
+        disks = {name for name in os.listdir("/sys/block") if not name.startswith(("loop", "ram"))}
+        with open("/proc/diskstats") as f:
+            rows = [line.split() for line in f]
+        # Sectors read and written, always 512 bytes in this file
+        totals["disk"] = sum((int(row[5]) + int(row[9])) * 512 for row in rows if row[2] in disks)
+    except (OSError, ValueError, IndexError):
+        pass
+    return totals
+
+def sse_message(event, seq, data):
+    return f"event: {event}\nid: {seq}\ndata: {json.dumps(data)}\n\n".encode()
+
+class SnapshotHub:
+    """Takes one snapshot per tick and fans the changes out to every connected client"""
+
+    def __init__(self, dashboard, interval=3.0):
+        self.dashboard = dashboard
+        self.interval = interval
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.state = {}
+        self.full = sse_message("snapshot", 0, {})
+        self.seq = 0
+        self.ticks = 0
+        self.errors = 0
+        self.io = None  # (monotonic time, io_totals()) at the previous tick, for rates
+
+    def tick(self):
+        snapshot = self.dashboard.snapshot()
+        snapshot.update(host_metrics())
+        now, totals = time.monotonic(), io_totals()
+        if self.io is not None and now > self.io[0]:
+            then, before = self.io
+            for name, total in totals.items():
+                if name in before:
+                    snapshot[f"{name}_bytes_per_s"] = round(max(total - before[name], 0) / (now - then))
+        self.io = (now, totals)
+        delta = {key: value for key, value in snapshot.items() if self.state.get(key) != value}
+        with self.lock:
+            self.seq += 1
+            self.ticks += 1
+            self.state = snapshot
+            # Encoded once, shared by every client
+            self.full = sse_message("snapshot", self.seq, snapshot)
+            message = sse_message("delta", self.seq, delta)
+            for client in self.clients:
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    self._resync(client)
+
+    def _resync(self, client):
+        while True:
+            try:
+                client.get_nowait()
+            except queue.Empty:
+                break
+        client.put_nowait(self.full)
+
+    def connect(self):
+        client = queue.Queue(CLIENT_BACKLOG)
+        with self.lock:
+            client.put_nowait(self.full)
+            self.clients.add(client)
+        return client
+
+    def disconnect(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def run(self, stop):
+        next_tick = time.monotonic()
+        while not stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                # Clients keep their last state and pick up again on the next good tick
+                self.errors += 1
+                logger.exception("Dashboard snapshot failed")
+            next_tick += self.interval
+            stop.wait(max(0.0, next_tick - time.monotonic()))
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    hub = None
+    page = b""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/":
+            self.send_body(self.page, "text/html; charset=utf-8")
+        elif self.path == "/snapshot":
+            with self.hub.lock:
+                state = self.hub.state
+            self.send_body(json.dumps(state).encode(), "application/json")
+        elif self.path == "/events":
+            self.stream_events()
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        client = self.hub.connect()
+        try:
+            while True:
+                try:
+                    message = client.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.hub.disconnect(client)
+
+def serve(dashboard, host="0.0.0.0", port=8080, interval=3.0):
+    """Start the hub and HTTP server on daemon threads; returns (server, hub, stop event)"""
+    hub = SnapshotHub(dashboard, interval)
+    with open(PAGE, "rb") as f:
+        page = f.read()
+    handler = type("Handler", (DashboardHandler,), {"hub": hub, "page": page})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    stop = threading.Event()
+    threading.Thread(target=hub.run, args=(stop,), name="dashboard-hub", daemon=True).start()
+    threading.Thread(target=server.serve_forever, name="dashboard-http", daemon=True).start()
+    return server, hub, stop
+
+if __name__ == "__main__":
+    import argparse
+    import standins
+    standins.install_aliases()
+    from solar_monitor import SolarMonitor
+    from battery_manager import BatteryManager
+    from dashboard import Dashboard
+
+    parser = argparse.ArgumentParser(description="Serve the GreenEdge dashboard with live data")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--interval", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server, hub, stop = serve(Dashboard(SolarMonitor(), BatteryManager()), args.host, args.port, args.interval)
+    print(f"Dashboard on http://{args.host}:{args.port}/")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        stop.set()
+        server.shutdown()
@@ -0,0 +1,160 @@
+# energy_ledger.py
+import math
+import time
+from collections import deque
+
+CHANNELS = ("generation", "consumption", "battery_in", "battery_out")
+CHANNEL_INDEX = {name: i for i, name in enumerate(CHANNELS)}
+PERIODS = ("minute", "hour", "day", "month")
+# Closed buckets kept per period for recent-history queries
+HISTORY = {"minute": 120, "hour": 72, "day": 62, "month": 24}
+# Grid carbon intensity displaced by solar generation
+CARBON_KG_PER_KWH = 0.4
+
+class EnergyLedger:
+    """Integrates timestamped power samples into kWh counters with calendar rollups
+
+    Each channel is integrated with the trapezoidal rule between consecutive samples.
+    Intervals are split at minute boundaries, so every rollup bucket gets exactly the
+    energy that fell inside it. Current and recent buckets are updated as samples
+    arrive; queries never rescan samples.
+    """
+
+    def __init__(self, carbon_kg_per_kwh=CARBON_KG_PER_KWH, max_gap_s=900, utc_offset_s=0):
+        self.carbon_kg_per_kwh = carbon_kg_per_kwh
+        self.max_gap_s = max_gap_s  # longer silences are treated as outages, not integrated
+        self.utc_offset_s = utc_offset_s  # where "today" and "this month" start
+        self.last = [None] * len(CHANNELS)  # (timestamp, power_w) per channel
+        self.totals = [0.0] * len(CHANNELS)
+        self.keys = [None] * len(PERIODS)
+        self.current = [[0.0] * len(CHANNELS) for _ in PERIODS]
+        self.history = [deque(maxlen=HISTORY[period]) for period in PERIODS]
+        self.gaps = 0
+        self.out_of_order = 0
+        self._day = None
+        self._month = None
+        # Span of the current minute bucket; samples inside it skip the rollup bookkeeping
+        self._minute_start = math.inf
+        self._minute_end = -math.inf
+
+    def period_keys(self, timestamp):
+        local = timestamp + self.utc_offset_s
+        day = int(local // 86400)
+        if day != self._day:
+            self._day = day
+            self._month = time.gmtime(day * 86400)[:2]
+        return int(local // 60), int(local // 3600), day, self._month
+
+    def _add(self, index, kwh, timestamp):
+        self.totals[index] += kwh
+        for period, key in enumerate(self.period_keys(timestamp)):
+            current = self.keys[period]
+            if key == current:
+                self.current[period][index] += kwh
+            elif current is None or key > current:
+                if current is not None:
+                    self.history[period].append((current, self.current[period]))
+                self.keys[period] = key
+                values = self.current[period] = [0.0] * len(CHANNELS)
+                values[index] = kwh
+            else:
+                # Another channel already moved on; credit the closed bucket
+                for closed_key, values in reversed(self.history[period]):
+                    if closed_key == key:
+                        values[index] += kwh
+                        break
+                    if closed_key < key:
+                        break
+        self._minute_start = self.keys[0] * 60 - self.utc_offset_s
+        self._minute_end = self._minute_start + 60
+
+    def _integrate(self, index, t0, p0, t1, p1):
+        if self._minute_start <= t0 and t1 <= self._minute_end:
+            kwh = (p0 + p1) / 2 * (t1 - t0) / 3.6e6
+            self.totals[index] += kwh
+            for values in self.current:
+                values[index] += kwh
+            return kwh
+        slope = (p1 - p0) / (t1 - t0)
+        total = 0.0
+        start, power = t0, p0
+        while True:
+            boundary = (math.floor((start + self.utc_offset_s) / 60) + 1) * 60 - self.utc_offset_s
+            if boundary >= t1:
+                kwh = (power + p1) / 2 * (t1 - start) / 3.6e6
+                self._add(index, kwh, start)
+                return total + kwh
+            boundary_power = p0 + slope * (boundary - t0)
+            kwh = (power + boundary_power) / 2 * (boundary - start) / 3.6e6
+            self._add(index, kwh, start)
+            total += kwh
+            start, power = boundary, boundary_power
+
+    def record(self, channel, power_w, timestamp=None):
+        """Add a power sample; returns the kWh integrated since the channel's previous sample"""
+        timestamp = time.time() if timestamp is None else timestamp
+        index = CHANNEL_INDEX[channel]
+        last = self.last[index]
+        if last is not None and timestamp <= last[0]:
+            # A repeated reading adds nothing; an older one is counted and ignored
+            if timestamp < last[0]:
+                self.out_of_order += 1
+            return 0.0
+        self.last[index] = (timestamp, power_w)
+        if last is None:
+            return 0.0
+        if timestamp - last[0] > self.max_gap_s:
+            self.gaps += 1
+            return 0.0
+        return self._integrate(index, last[0], last[1], timestamp, power_w)
+
+    def add(self, channel, energy_kwh, timestamp=None, start=None):
+        """Add an already-integrated amount, spread evenly over [start, timestamp] if given"""
+        timestamp = time.time() if timestamp is None else timestamp
+        index = CHANNEL_INDEX[channel]
+        if start is None or start >= timestamp:
+            self._add(index, energy_kwh, timestamp)
+        else:
+            power_w = energy_kwh * 3.6e6 / (timestamp - start)
+            self._integrate(index, start, power_w, timestamp, power_w)
+
+    def energy(self, channel, period="day", now=None):
+        """kWh for the current minute/hour/day/month, or the lifetime total for period=None"""
+        index = CHANNEL_INDEX[channel]
+        if period is None:
+            return self.totals[index]
+        i = PERIODS.index(period)
+        now = time.time() if now is None else now
+        if self.period_keys(now)[i] != self.keys[i]:
+            return 0.0
+        return self.current[i][index]
+
+    def carbon_kg(self, period="day", now=None):
+        """CO2 avoided by solar generation"""
+        return self.energy("generation", period, now) * self.carbon_kg_per_kwh
+
+    def closed(self, period):
+        """Recent completed buckets, oldest first, as (key, {channel: kWh})"""
+        return [(key, dict(zip(CHANNELS, values))) for key, values in self.history[PERIODS.index(period)]]
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        report = {f"{channel}_kwh_{period}": self.energy(channel, period, now)
+                  for period in ("day", "month") for channel in CHANNELS}
+        report["carbon_kg_day"] = self.carbon_kg("day", now)
+        report["carbon_kg_month"] = self.carbon_kg("month", now)
+        report["carbon_kg_total"] = self.totals[0] * self.carbon_kg_per_kwh
+        return report
+
+if __name__ == "__main__":
+    ledger = EnergyLedger()
+    start = 1_700_000_000.0
+    samples = 86400 * 10  # one day at 10 Hz
+    began = time.perf_counter()
+    for i in range(samples):
+        t = start + i / 10
+        ledger.record("generation", 1000 * max(0.0, math.sin((t % 86400) / 86400 * 2 * math.pi)), t)
+    elapsed = time.perf_counter() - began
+    print(f"{samples} samples in {elapsed:.2f} s ({elapsed / samples * 1e6:.2f} us/sample)")
+    print(f"Generated {ledger.energy('generation', None):.3f} kWh, "
+          f"{ledger.totals[0] * ledger.carbon_kg_per_kwh:.3f} kg CO2 avoided")
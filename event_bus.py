@@ -0,0 +1,191 @@
+# event_bus.py
+import atexit
+import json
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+BatteryCharged = namedtuple("BatteryCharged", "timestamp energy_kwh charge_level")
+BatteryDischarged = namedtuple("BatteryDischarged", "timestamp energy_kwh charge_level")
+BatteryInsufficient = namedtuple("BatteryInsufficient", "timestamp energy_kwh charge_level")
+TaskAdmitted = namedtuple("TaskAdmitted", "timestamp load_kw duration_hours priority")
+# reason is 'surplus' (waiting for solar) or 'low_battery'
+TaskDeferred = namedtuple("TaskDeferred", "timestamp load_kw duration_hours priority reason")
+# reason is 'low_battery', 'insufficient_energy' (queued and not deferrable) or 'exceeds_capacity'
+TaskRejected = namedtuple("TaskRejected", "timestamp load_kw duration_hours priority reason")
+SensorSample = namedtuple("SensorSample", "timestamp voltage current power")
+
+class EventBus:
+    """Hands events to sinks on a background thread
+
+    Publishers check `active` before building an event, so with no sinks subscribed
+    publishing costs one attribute read. When the queue is full, events are dropped
+    rather than blocking the caller.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.queue = queue.Queue(maxsize)
+        self.sinks = []
+        self.active = False
+        self.published = 0
+        self.dropped = 0
+        self.sink_errors = 0
+        self.thread = None
+
+    def subscribe(self, sink):
+        self.sinks = self.sinks + [sink]
+        self.active = True
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._drain, name="event-bus", daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+        return sink
+
+    def unsubscribe(self, sink):
+        self.sinks = [s for s in self.sinks if s is not sink]
+        self.active = bool(self.sinks)
+
+    def publish(self, event):
+        try:
+            self.queue.put_nowait(event)
+            self.published += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _dispatch(self, sinks, event):
+        for sink in sinks:
+            try:
+                sink.handle(event)
+            except Exception:
+                self.sink_errors += 1
+
+    def _drain(self):
+        while True:
+            events = [self.queue.get()]
+            # Take whatever else is waiting so sinks can write in batches
+            while True:
+                try:
+                    events.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            sinks = self.sinks
+            for event in events:
+                self._dispatch(sinks, event)
+            for sink in sinks:
+                try:
+                    sink.flush()
+                except Exception:
+                    self.sink_errors += 1
+            for _ in events:
+                self.queue.task_done()
+
+    def flush(self, timeout=1.0):
+        """Wait until queued events have reached the sinks; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+            "sink_errors": self.sink_errors,
+        }
+
+# Shared bus used by the control-path classes unless they are given their own
+bus = EventBus()
+
+# Keyed by type name so events survive the module being loaded twice (e.g. run as a script)
+CONSOLE_FORMATS = {
+    "BatteryCharged": lambda e: f"Battery charged to {e.charge_level} kWh",
+    "BatteryDischarged": lambda e: f"Battery discharged {e.energy_kwh} kWh, remaining: {e.charge_level} kWh",
+    "BatteryInsufficient": lambda e: "Insufficient battery charge!",
+    "TaskAdmitted": lambda e: f"Task scheduled: {e.load_kw}kW for {e.duration_hours}h with priority {e.priority}",
+    "TaskDeferred": lambda e: ("Deferring task to the next solar surplus window." if e.reason == "surplus"
+                             else "Low battery. Deferring task."),
+    "TaskRejected": lambda e: (f"Task rejected ({e.reason.replace('_', ' ')}): {e.load_kw}kW for "
+                               f"{e.duration_hours}h with priority {e.priority}"),
+    "SensorSample": lambda e: f"Voltage: {e.voltage}V, Current: {e.current}A, Power: {e.power}W",
+}
+
+class ConsoleSink:
+    """Prints the same messages the classes used to print themselves"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def handle(self, event):
+        stream = self.stream or sys.stdout
+        stream.write(CONSOLE_FORMATS[type(event).__name__](event) + "\n")
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def handle(self, event):
+        record = {"event": type(event).__name__}
+        record.update(event._asdict())
+        self.file.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class MetricsSink:
+    """Event counts, energy totals and latest readings, for exporters to read"""
+
+    def __init__(self):
+        self.counts = {}
+        self.charged_kwh = 0.0
+        self.discharged_kwh = 0.0
+        self.charge_level = None
+        self.power = None
+
+    def handle(self, event):
+        name = type(event).__name__
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if name == "BatteryCharged":
+            self.charged_kwh += event.energy_kwh
+            self.charge_level = event.charge_level
+        elif name == "BatteryDischarged":
+            self.discharged_kwh += event.energy_kwh
+            self.charge_level = event.charge_level
+        elif name == "SensorSample":
+            self.power = event.power
+
+    def flush(self):
+        pass
+
+    def snapshot(self):
+        return {
+            "counts": dict(self.counts),
+            "charged_kwh": self.charged_kwh,
+            "discharged_kwh": self.discharged_kwh,
+            "charge_level": self.charge_level,
+            "power": self.power,
+        }
+
+if __name__ == "__main__":
+    from battery_manager import BatteryManager
+
+    metrics = bus.subscribe(MetricsSink())
+    battery = BatteryManager(events=bus)
+    start = time.perf_counter()
+    for _ in range(5000):
+        battery.charge(0.001)
+        battery.discharge(1, 0.001)
+    elapsed = time.perf_counter() - start
+    bus.flush()
+    print(f"10000 operations in {elapsed * 1000:.1f} ms; {bus.stats()}")
+    print(metrics.snapshot())
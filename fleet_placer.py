@@ -0,0 +1,181 @@
+# fleet_placer.py
+import bisect
+
+class NodeState:
+    def __init__(self, name, battery_kwh, solar_w=0.0, cpu_capacity=1.0):
+        self.name = name
+        self.battery_kwh = battery_kwh
+        self.solar_w = solar_w
+        self.cpu_capacity = cpu_capacity
+        self.committed_kwh = 0.0
+        self.committed_cpu = 0.0
+        self.tasks = {}  # task id -> (energy_kwh, cpu, priority)
+        self.key = None  # current (score, name) entry in the placer's index
+        self.bucket = None  # which index holds the key: the placer's index or saturated
+
+    @property
+    def cpu_free(self):
+        return self.cpu_capacity - self.committed_cpu
+
+class FleetPlacer:
+    def __init__(self, horizon_hours=1.0):
+        # Solar expected over the horizon counts towards a node's energy budget
+        self.horizon_hours = horizon_hours
+        self.nodes = {}
+        self.index = []  # (available energy, name), ascending, for nodes with CPU to spare
+        self.saturated = []  # the same for nodes with no CPU left, which only zero-CPU tasks fit
+        self.placements = {}  # task id -> node name
+        self.unplaced = {}  # task id -> (energy_kwh, cpu, priority)
+
+    def available_kwh(self, node):
+        return node.battery_kwh + node.solar_w * self.horizon_hours / 1000 - node.committed_kwh
+
+    def _unindex(self, node):
+        del node.bucket[bisect.bisect_left(node.bucket, node.key)]
+
+    def _reindex(self, node):
+        if node.key is not None:
+            self._unindex(node)
+        node.key = (self.available_kwh(node), node.name)
+        # Keeping CPU-bound nodes apart means place() never has to walk past them
+        node.bucket = self.index if node.cpu_free > 0 else self.saturated
+        bisect.insort(node.bucket, node.key)
+
+    def update_node(self, name, battery_kwh=None, solar_w=None, cpu_capacity=None):
+        """Add a node or refresh its state; rebalances if it is now over-committed"""
+        node = self.nodes.get(name)
+        if node is None:
+            node = self.nodes[name] = NodeState(name, battery_kwh or 0.0, solar_w or 0.0,
+                                                1.0 if cpu_capacity is None else cpu_capacity)
+        else:
+            if battery_kwh is not None:
+                node.battery_kwh = battery_kwh
+            if solar_w is not None:
+                node.solar_w = solar_w
+            if cpu_capacity is not None:
+                node.cpu_capacity = cpu_capacity
+        previous = node.key
+        self._reindex(node)
+        if self.available_kwh(node) < 0 or node.cpu_free < 0:
+            return self.rebalance([name])
+        if self.unplaced and (previous is None or node.key > previous):
+            return self.retry_unplaced()
+        return []
+
+    def remove_node(self, name):
+        """Drop a node and move its tasks elsewhere"""
+        node = self.nodes.pop(name)
+        self._unindex(node)
+        moves = []
+        for task_id, task in node.tasks.items():
+            del self.placements[task_id]
+            moves.append((task_id, name, self.place(task_id, *task)))
+        return moves
+
+    def _commit(self, node, task_id, task):
+        energy_kwh, cpu, _ = task
+        node.tasks[task_id] = task
+        node.committed_kwh += energy_kwh
+        node.committed_cpu += cpu
+        self.placements[task_id] = node.name
+        self._reindex(node)
+
+    def place(self, task_id, energy_kwh, cpu=0.0, priority=1):
+        """Put a task on the node with the most energy that also has CPU headroom
+
+        Walks down the energy index of nodes with CPU to spare until one has enough CPU
+        or the energy runs out, so a node further down is still found when the best ones
+        are short of CPU. Nodes with no CPU left are indexed separately and only
+        considered for tasks that need none. Returns the node name, or None if no node
+        can take it (the task is then kept in unplaced).
+        """
+        task = (energy_kwh, cpu, priority)
+        node = self._best(self.index, energy_kwh, cpu)
+        if cpu <= 0:
+            other = self._best(self.saturated, energy_kwh, cpu)
+            if other is not None and (node is None or other.key > node.key):
+                node = other
+        if node is None:
+            self.unplaced[task_id] = task
+            return None
+        self.unplaced.pop(task_id, None)
+        self._commit(node, task_id, task)
+        return node.name
+
+    def _best(self, index, energy_kwh, cpu):
+        for i in range(len(index) - 1, -1, -1):
+            available, name = index[i]
+            if available < energy_kwh:
+                return None
+            node = self.nodes[name]
+            if node.cpu_free >= cpu:
+                return node
+        return None
+
+    def place_many(self, tasks):
+        """Place (task_id, energy_kwh, cpu, priority) tuples, largest energy first"""
+        order = sorted(tasks, key=lambda task: task[1], reverse=True)
+        return {task[0]: self.place(*task) for task in order}
+
+    def complete(self, task_id):
+        """Release the energy and CPU committed to a finished task"""
+        name = self.placements.pop(task_id)
+        node = self.nodes[name]
+        energy_kwh, cpu, _ = node.tasks.pop(task_id)
+        node.committed_kwh -= energy_kwh
+        node.committed_cpu -= cpu
+        self._reindex(node)
+
+    def rebalance(self, names=None):
+        """Move tasks off over-committed nodes, lowest priority and largest first
+
+        Returns (task id, from node, to node or None) for every task moved.
+        """
+        names = self.nodes if names is None else names
+        moves = []
+        for name in list(names):
+            node = self.nodes[name]
+            if self.available_kwh(node) >= 0 and node.cpu_free >= 0:
+                continue
+            victims = sorted(node.tasks.items(), key=lambda item: (item[1][2], -item[1][0]))
+            for task_id, task in victims:
+                if self.available_kwh(node) >= 0 and node.cpu_free >= 0:
+                    break
+                del node.tasks[task_id]
+                node.committed_kwh -= task[0]
+                node.committed_cpu -= task[1]
+                del self.placements[task_id]
+                moves.append((task_id, name, task))
+            self._reindex(node)
+        moves.sort(key=lambda move: -move[2][2])
+        return [(task_id, source, self.place(task_id, *task)) for task_id, source, task in moves]
+
+    def retry_unplaced(self):
+        """Try again to place tasks no node could take, highest priority first"""
+        moves = []
+        for task_id, task in sorted(self.unplaced.items(), key=lambda item: -item[1][2]):
+            target = self.place(task_id, *task)
+            if target is not None:
+                moves.append((task_id, None, target))
+        return moves
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    random.seed(1)
+    placer = FleetPlacer()
+    for i in range(1000):
+        placer.update_node(f"node-{i}", battery_kwh=random.uniform(1, 10),
+                           solar_w=random.uniform(0, 800), cpu_capacity=4)
+    tasks = [(f"task-{i}", random.uniform(0.01, 0.5), 0.25, random.randint(0, 3)) for i in range(10000)]
+    start = time.perf_counter()
+    placed = placer.place_many(tasks)
+    elapsed = time.perf_counter() - start
+    print(f"Placed {sum(1 for node in placed.values() if node)} of {len(tasks)} tasks "
+          f"in {elapsed * 1000:.1f} ms ({elapsed / len(tasks) * 1e6:.1f} us/task)")
+    busiest = max(placer.nodes.values(), key=lambda node: len(node.tasks)).name
+    start = time.perf_counter()
+    moves = placer.update_node(busiest, battery_kwh=0, solar_w=0)
+    elapsed = time.perf_counter() - start
+    print(f"{busiest} lost power; rebalanced {len(moves)} tasks in {elapsed * 1000:.1f} ms")
@@ -1,21 +1,209 @@
 # load_balancer.py
+import heapq
+import itertools
+import math
+import time
+from event_bus import bus, TaskAdmitted, TaskDeferred, TaskRejected
+
+PRIORITIES = {'low': 0, 'normal': 1, 'high': 2, 'critical': 3}
+# Tasks at or above this priority may draw the battery below the reserve
+RESERVE_PRIORITY = PRIORITIES['high']
+
+class Task:
+    def __init__(self, load_kw, duration_hours, priority='normal', deadline=None, deferrable=True, name=None):
+        self.load_kw = load_kw
+        self.duration_hours = duration_hours
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {', '.join(PRIORITIES)}")
+        self.priority = priority
+        self.rank = PRIORITIES[priority]
+        self.deadline = deadline  # completion deadline, epoch seconds
+        self.deferrable = deferrable
+        self.name = name
+        self.energy_kwh = load_kw * duration_hours
+        self.state = 'pending'  # -> admitted, missed or rejected
+
+    @property
+    def latest_start(self):
+        if self.deadline is None:
+            return math.inf
+        return self.deadline - self.duration_hours * 3600
+
 class LoadBalancer:
-    def __init__(self, battery_manager):
+    def __init__(self, battery_manager, reserve_kwh=1, forecast=None, events=None):
         self.battery_manager = battery_manager
+        self.events = bus if events is None else events
+        self.reserve_kwh = reserve_kwh
+        self.forecast = forecast  # optional SolarForecast for lookahead
+        # Tasks to consider on the next tick: highest priority first, earliest
+        # latest-start within a priority
+        self.queue = []
+        # Deferrable tasks held for a solar surplus, by the time the surplus starts
+        self.held = []
+        # Deferrable tasks waiting for charge, by the energy they need
+        self.waiting = []
+        # Latest-start order, for finding deadline misses without scanning the queue
+        self.deadlines = []
+        self.sequence = itertools.count()
+        self.pending = 0
+        self.admitted = 0
+        self.missed = 0
+        self.rejected = 0
+
+    def reserve_blocks(self, task):
+        return self.battery_manager.charge_level <= self.reserve_kwh and task.rank < RESERVE_PRIORITY
 
-    def schedule_task(self, load_kw, duration_hours, priority='normal'):
-        if self.battery_manager.charge_level <= 1 and priority != 'high':
-            print("Low battery. Postponing non-critical task.")
+    def should_wait(self, task, now, surplus_now=None):
+        """Hold deferrable work for a predicted solar surplus that still meets its deadline"""
+        if self.forecast is None or not task.deferrable:
             return False
-        else:
-            success = self.battery_manager.discharge(load_kw, duration_hours)
-            if success:
-                print(f"Task scheduled: {load_kw}kW for {duration_hours}h with priority {priority}")
-            return success
+        if surplus_now is None:
+            surplus_now = self.forecast.in_surplus(now)
+        return not surplus_now and self.forecast.next_surplus(now, task.latest_start) is not None
+
+    def run(self, task):
+        success = self.battery_manager.discharge(task.load_kw, task.duration_hours)
+        if success:
+            task.state = 'admitted'
+            self.admitted += 1
+            if self.events.active:
+                self.events.publish(TaskAdmitted(time.time(), task.load_kw, task.duration_hours, task.priority))
+        return success
+
+    def _publish(self, event_type, task, reason):
+        if self.events.active:
+            self.events.publish(event_type(time.time(), task.load_kw, task.duration_hours, task.priority, reason))
+
+    def fits_battery(self, task):
+        """Whether the task could ever run, i.e. on a fully charged battery"""
+        return task.energy_kwh <= self.battery_manager.capacity_kwh
+
+    def _reject(self, task, reason):
+        task.state = 'rejected'
+        self.rejected += 1
+        self._publish(TaskRejected, task, reason)
+
+    def schedule_task(self, load_kw, duration_hours, priority='normal', deadline=None, deferrable=False):
+        task = Task(load_kw, duration_hours, priority, deadline, deferrable)
+        if not self.fits_battery(task):
+            self._reject(task, 'exceeds_capacity')
+            return False
+        if self.should_wait(task, time.time()):
+            self._publish(TaskDeferred, task, 'surplus')
+            self.submit(task)
+            return False
+        if self.reserve_blocks(task):
+            if deferrable:
+                self._publish(TaskDeferred, task, 'low_battery')
+                self.submit(task)
+            else:
+                self._reject(task, 'low_battery')
+            return False
+        success = self.run(task)
+        if not success:
+            if deferrable:
+                self.submit(task)
+            else:
+                self._reject(task, 'insufficient_energy')
+        return success
+
+    def submit(self, task):
+        """Queue a task for admission on a later tick"""
+        seq = next(self.sequence)
+        heapq.heappush(self.queue, (-task.rank, task.latest_start, seq, task))
+        if task.deadline is not None:
+            heapq.heappush(self.deadlines, (task.latest_start, seq, task))
+        self.pending += 1
+        return task
+
+    def expire(self, now):
+        missed = []
+        while self.deadlines and self.deadlines[0][0] < now:
+            task = heapq.heappop(self.deadlines)[2]
+            if task.state == 'pending':
+                task.state = 'missed'
+                self.pending -= 1
+                self.missed += 1
+                missed.append(task)
+        return missed
+
+    def _release(self, now, surplus_now):
+        """Move held tasks whose surplus has begun, and waiting tasks the charge now covers, to the queue"""
+        held = self.held
+        while held and (surplus_now or held[0][0] <= now):
+            entry = heapq.heappop(held)[1]
+            if entry[3].state == 'pending':
+                heapq.heappush(self.queue, entry)
+        waiting = self.waiting
+        charge = self.battery_manager.charge_level
+        while waiting and waiting[0][0] <= charge:
+            entry = heapq.heappop(waiting)[1]
+            if entry[3].state == 'pending':
+                heapq.heappush(self.queue, entry)
+
+    def tick(self, now=None):
+        """Admit queued work in priority order while the battery budget allows
+
+        With a forecast, deferrable tasks are held back until a predicted surplus
+        window unless none arrives before their deadline.
+        Returns the tasks admitted and the tasks whose deadline passed this tick.
+        Held tasks are kept by the time their surplus starts and deferrable tasks too
+        large for the current charge by the energy they need, so a tick only touches
+        tasks that can run now: O(log n) each, however much work is parked. Tasks that
+        cannot fit even a full battery are rejected. Entries for tasks that are no
+        longer pending are dropped when they come off a heap.
+        """
+        now = time.time() if now is None else now
+        missed = self.expire(now)
+        surplus_now = self.forecast.in_surplus(now) if self.forecast is not None else False
+        self._release(now, surplus_now)
+        admitted = []
+        queue = self.queue
+        while queue:
+            entry = queue[0]
+            task = entry[3]
+            if task.state != 'pending':
+                heapq.heappop(queue)
+                continue
+            if not self.fits_battery(task):
+                heapq.heappop(queue)
+                self.pending -= 1
+                self._reject(task, 'exceeds_capacity')
+                continue
+            if self.reserve_blocks(task):
+                # Everything further down the queue has the same or lower priority
+                break
+            heapq.heappop(queue)
+            if self.should_wait(task, now, surplus_now):
+                heapq.heappush(self.held, (self.forecast.next_surplus(now, task.latest_start), entry))
+            elif task.energy_kwh <= self.battery_manager.charge_level and self.run(task):
+                self.pending -= 1
+                admitted.append(task)
+            elif task.deferrable:
+                heapq.heappush(self.waiting, (task.energy_kwh, entry))
+            else:
+                self.pending -= 1
+                self._reject(task, 'insufficient_energy')
+        return admitted, missed
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "admitted": self.admitted,
+            "missed": self.missed,
+            "rejected": self.rejected,
+        }
 
 if __name__ == "__main__":
     from battery_manager import BatteryManager
+    from event_bus import ConsoleSink
+    bus.subscribe(ConsoleSink())
     battery = BatteryManager()
     lb = LoadBalancer(battery)
     lb.schedule_task(3, 1, 'normal')
     lb.schedule_task(1, 0.5, 'high')
+    lb.schedule_task(8, 1, 'normal', deadline=time.time() + 4 * 3600, deferrable=True)
+    battery.charge(5)
+    lb.tick()
+    bus.flush()
+    print(lb.stats())
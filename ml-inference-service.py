@@ -119,13 +119,35 @@ Solar Panel and Battery Monitoring System
 Collects real-time energy data from solar panels and battery bank
 """
 
+import os
 import time
 import json
+import ctypes
+import fcntl
+import threading
 import requests
+import numpy as np
 import RPi.GPIO as GPIO
 from datetime import datetime
 import logging
 from prometheus_client import start_http_server, Gauge, Counter
+from telemetry_store import TelemetryStore
+from energy_ledger import EnergyLedger, CARBON_KG_PER_KWH
+
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", "/var/lib/greenedge/telemetry")
+
+# High-rate ADC sampling configuration
+ADC_BACKEND = os.environ.get("ADC_BACKEND", "simulated")  # simulated or spidev
+ADC_SAMPLE_RATE_HZ = float(os.environ.get("ADC_SAMPLE_RATE_HZ", "1000"))
+ADC_BLOCK_SIZE = int(os.environ.get("ADC_BLOCK_SIZE", "50"))
+ADC_BUFFER_SECONDS = float(os.environ.get("ADC_BUFFER_SECONDS", "60"))
+UPDATE_INTERVAL_S = float(os.environ.get("UPDATE_INTERVAL_S", "30"))
+SUMMARY_PERCENTILES = (50, 95, 99)
+
+# ADC channel assignment; all channels are read together for every sample
+CHANNELS = ('solar_voltage', 'solar_current', 'battery_voltage', 'consumption_voltage')
+ADC_VREF = 3.3
+ADC_COUNTS = 1024
 
 # Prometheus metrics
 SOLAR_POWER = Gauge('solar_power_watts', 'Current solar panel power output')
@@ -133,11 +155,191 @@ BATTERY_LEVEL = Gauge('battery_level_percent', 'Battery charge level')
 POWER_CONSUMPTION = Gauge('power_consumption_watts', 'Current power consumption')
 ENERGY_EFFICIENCY = Gauge('energy_efficiency_percent', 'System energy efficiency')
 CARBON_SAVED = Counter('carbon_saved_kg', 'Total CO2 saved in kg')
+ENERGY_TODAY = Gauge('energy_today_kwh', 'Energy since local midnight', ['channel'])
+CARBON_TODAY = Gauge('carbon_saved_today_kg', 'CO2 avoided since local midnight')
+SIGNAL_SUMMARY = Gauge('energy_signal_summary', 'Summary of high-rate samples over the last update interval',
+                       ['signal', 'stat'])
+ADC_SAMPLES = Counter('adc_samples_total', 'ADC samples taken across all channels together')
+ADC_OVERRUNS = Counter('adc_samples_overwritten_total', 'Samples overwritten before an update read them')
+
+class SimulatedADC:
+    """Random raw counts on every channel, for development and tests"""
+
+    def __init__(self, channels=len(CHANNELS), seed=None):
+        self.channels = channels
+        self.rng = np.random.default_rng(seed)
+
+    def read_block(self, out, sample_interval):
+        out[:] = self.rng.integers(200, 901, size=out.shape)
+
+class SpiTransfer(ctypes.Structure):
+    """struct spi_ioc_transfer from linux/spi/spidev.h"""
+    _fields_ = [('tx_buf', ctypes.c_uint64), ('rx_buf', ctypes.c_uint64), ('len', ctypes.c_uint32),
+                ('speed_hz', ctypes.c_uint32), ('delay_usecs', ctypes.c_uint16), ('bits_per_word', ctypes.c_uint8),
+                ('cs_change', ctypes.c_uint8), ('tx_nbits', ctypes.c_uint8), ('rx_nbits', ctypes.c_uint8),
+                ('word_delay_usecs', ctypes.c_uint8), ('pad', ctypes.c_uint8)]
+
+def spi_ioc_message(segments):
+    """SPI_IOC_MESSAGE(segments): _IOW('k', 0, char[segments * sizeof(struct spi_ioc_transfer)])"""
+    return (1 << 30) | (segments * ctypes.sizeof(SpiTransfer) << 16) | (ord('k') << 8)
+
+class SpiADC:
+    """MCP3008 on the SPI bus via spidev
+
+    Every sample is a single SPI_IOC_MESSAGE ioctl with one 3-byte segment per channel.
+    The MCP3008 only starts a conversion on a falling chip select, so the channels
+    can't share one xfer2 buffer; the segments release chip select between them instead.
+    Replies are written by the kernel straight into a block-sized array.
+    """
+
+    def __init__(self, channels=len(CHANNELS), bus=0, device=0, speed_hz=1350000):
+        import spidev
+        self.channels = channels
+        self.speed_hz = speed_hz
+        self.spi = spidev.SpiDev()
+        self.spi.open(bus, device)
+        self.spi.max_speed_hz = speed_hz
+        # Single-ended conversion request per channel: start bit, mode and channel, padding
+        requests = [byte for channel in range(channels) for byte in (1, (8 + channel) << 4, 0)]
+        self.requests = (ctypes.c_uint8 * len(requests))(*requests)
+        self.request = spi_ioc_message(channels)
+        self.messages = []
+        self.replies = np.zeros((0, channels, 3), dtype=np.uint8)
+
+    def prepare(self, samples):
+        """Build the per-sample messages once; they stay valid while self.replies is alive"""
+        self.replies = np.zeros((samples, self.channels, 3), dtype=np.uint8)
+        tx = ctypes.addressof(self.requests)
+        rx = self.replies.ctypes.data
+        self.messages = []
+        for sample in range(samples):
+            message = (SpiTransfer * self.channels)()
+            for channel, segment in enumerate(message):
+                segment.tx_buf = tx + 3 * channel
+                segment.rx_buf = rx + 3 * (sample * self.channels + channel)
+                segment.len = 3
+                segment.speed_hz = self.speed_hz
+                segment.cs_change = channel < self.channels - 1
+            self.messages.append(message)
+
+    def read_block(self, out, sample_interval):
+        """Fill out with samples spaced sample_interval apart; replies are decoded in one pass"""
+        if len(self.messages) != len(out):
+            self.prepare(len(out))
+        fd = self.spi.fileno()
+        next_sample = time.perf_counter()
+        for message in self.messages:
+            fcntl.ioctl(fd, self.request, message)
+            next_sample += sample_interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        replies = self.replies
+        out[:] = ((replies[:, :, 1] & 3).astype(np.uint16) << 8) | replies[:, :, 2]
+
+def make_backend(name):
+    if name == "spidev":
+        return SpiADC()
+    if name == "simulated":
+        return SimulatedADC()
+    raise ValueError(f"Unknown ADC backend: {name}")
+
+class SamplingEngine:
+    """Samples all ADC channels at a fixed rate into a preallocated ring buffer"""
+
+    def __init__(self, backend, rate_hz=ADC_SAMPLE_RATE_HZ, block_size=ADC_BLOCK_SIZE,
+                 buffer_seconds=ADC_BUFFER_SECONDS):
+        self.backend = backend
+        self.rate_hz = rate_hz
+        self.capacity = max(int(rate_hz * buffer_seconds), block_size)
+        self.buffer = np.zeros((self.capacity, backend.channels), dtype=np.uint16)
+        self.block = np.empty((block_size, backend.channels), dtype=np.uint16)
+        self.total = 0  # samples ever written; total % capacity is the next slot
+        self.read_mark = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def step(self):
+        """Read one block from the backend into the ring"""
+        self.backend.read_block(self.block, 1 / self.rate_hz)
+        n = len(self.block)
+        with self.lock:
+            at = self.total % self.capacity
+            first = min(n, self.capacity - at)
+            self.buffer[at:at + first] = self.block[:first]
+            self.buffer[:n - first] = self.block[first:]
+            self.total += n
+        ADC_SAMPLES.inc(n)
+
+    def run(self):
+        block_seconds = len(self.block) / self.rate_hz
+        next_block = time.monotonic()
+        while not self.stop_event.is_set():
+            self.step()
+            next_block += block_seconds
+            delay = next_block - time.monotonic()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                next_block = time.monotonic()  # fell behind; don't try to catch up in a burst
+
+    def start(self):
+        threading.Thread(target=self.run, name="adc-sampler", daemon=True).start()
+        return self
+
+    def drain(self):
+        """Samples taken since the previous drain, oldest first, as an (n, channels) copy"""
+        with self.lock:
+            total = self.total
+            n = total - self.read_mark
+            if n > self.capacity:
+                ADC_OVERRUNS.inc(n - self.capacity)
+                n = self.capacity
+            self.read_mark = total
+            end = total % self.capacity
+            if n <= end:
+                return self.buffer[end - n:end].copy()
+            return np.concatenate((self.buffer[self.capacity - (n - end):], self.buffer[:end]))
+
+    def last(self):
+        """Most recent sample across all channels"""
+        with self.lock:
+            return self.buffer[(self.total - 1) % self.capacity].copy()
+
+def counts_to_volts(counts):
+    return counts * (ADC_VREF / ADC_COUNTS)
+
+def convert(samples):
+    """Per-sample physical values from raw counts; solar power is v * i at each instant"""
+    volts = counts_to_volts(samples.astype(np.float64))
+    solar_voltage = volts[:, 0]
+    solar_current = volts[:, 1]
+    return {
+        'solar_voltage': solar_voltage,
+        'solar_current': solar_current,
+        # Scale to realistic wattage, capped at 3kW
+        'solar_power': np.clip(solar_voltage * solar_current * 100, 0, 3000),
+        # Battery percentage for a 12V system
+        'battery_level': np.clip((volts[:, 2] - 10.5) / (14.4 - 10.5) * 100, 0, 100),
+        # Consumption scaled to realistic watts, capped at 2kW
+        'consumption': np.clip(volts[:, 3] * 500, 0, 2000),
+    }
+
+def summarize(values):
+    stats = {'mean': float(values.mean()), 'min': float(values.min()), 'max': float(values.max())}
+    for q, value in zip(SUMMARY_PERCENTILES, np.percentile(values, SUMMARY_PERCENTILES)):
+        stats[f'p{q}'] = float(value)
+    return stats
 
 class EnergyMonitor:
-    def __init__(self):
+    def __init__(self, store=None, backend=None):
         self.logger = logging.getLogger(__name__)
+        self.store = store  # optional TelemetryStore
+        self.latest = {}  # last readings, for the web dashboard
+        self.ledger = EnergyLedger()
+        self.last_update = None  # wall-clock time the previous update covered up to
         self.setup_gpio()
+        self.engine = SamplingEngine(backend or make_backend(ADC_BACKEND))
         
     def setup_gpio(self):
         """Setup GPIO pins for sensor readings"""
@@ -146,31 +348,39 @@ class EnergyMonitor:
         GPIO.setup(19, GPIO.IN)  # Battery sensor
         GPIO.setup(20, GPIO.IN)  # Power consumption sensor
         
+    def start_sampling(self):
+        self.last_update = time.time()
+        self.engine.start()
+        
+    def read_instant(self):
+        """Physical values of the most recent sample"""
+        if self.engine.total == 0:
+            self.engine.step()
+        values = convert(self.engine.last()[None, :])
+        return {name: float(value[0]) for name, value in values.items()}
+        
+    def read_solar(self):
+        """Read solar panel voltage, current and power output from one simultaneous sample"""
+        values = self.read_instant()
+        return values['solar_voltage'], values['solar_current'], values['solar_power']
+    
     def read_solar_power(self):
         """Read solar panel power output"""
-        # Simulate ADC reading from solar panel current/voltage sensors
-        voltage = self.read_adc(0) * 3.3 / 1024  # Convert ADC to voltage
-        current = self.read_adc(1) * 3.3 / 1024  # Convert ADC to current
-        power = voltage * current * 100  # Scale to realistic wattage
-        return max(0, min(power, 3000))  # Cap at 3kW
+        return self.read_solar()[2]
     
     def read_battery_level(self):
         """Read battery bank charge level"""
-        battery_voltage = self.read_adc(2) * 3.3 / 1024
-        # Convert voltage to percentage (12V system)
-        percentage = ((battery_voltage - 10.5) / (14.4 - 10.5)) * 100
-        return max(0, min(percentage, 100))
+        return self.read_instant()['battery_level']
     
     def read_power_consumption(self):
         """Read current power consumption"""
-        consumption_voltage = self.read_adc(3) * 3.3 / 1024
-        power = consumption_voltage * 500  # Scale to realistic consumption
-        return max(0, min(power, 2000))  # Cap at 2kW
+        return self.read_instant()['consumption']
     
     def read_adc(self, channel):
-        """Simulate ADC reading (replace with actual ADC code)"""
-        import random
-        return random.randint(200, 900)
+        """Raw count of a channel from the most recent sample"""
+        if self.engine.total == 0:
+            self.engine.step()
+        return int(self.engine.last()[channel])
     
     def calculate_efficiency(self, solar_power, consumption):
         """Calculate energy efficiency"""
@@ -179,35 +389,78 @@ class EnergyMonitor:
         return 0
     
     def update_metrics(self):
-        """Update Prometheus metrics"""
-        solar_power = self.read_solar_power()
-        battery_level = self.read_battery_level()
-        consumption = self.read_power_consumption()
+        """Summarize the samples taken since the last update and export them"""
+        samples = self.engine.drain()
+        if len(samples) == 0:
+            # Sampling thread not running; take one block so there is something to report
+            self.engine.step()
+            samples = self.engine.drain()
+        now = time.time()
+        values = convert(samples)
+        summaries = {name: summarize(series) for name, series in values.items()}
+        for name, stats in summaries.items():
+            for stat, value in stats.items():
+                SIGNAL_SUMMARY.labels(name, stat).set(value)
+        
+        solar_voltage = summaries['solar_voltage']['mean']
+        solar_current = summaries['solar_current']['mean']
+        solar_power = summaries['solar_power']['mean']
+        battery_level = summaries['battery_level']['mean']
+        consumption = summaries['consumption']['mean']
         efficiency = self.calculate_efficiency(solar_power, consumption)
         
         SOLAR_POWER.set(solar_power)
         BATTERY_LEVEL.set(battery_level)
         POWER_CONSUMPTION.set(consumption)
         ENERGY_EFFICIENCY.set(efficiency)
+        self.latest = {
+            "solar_power_w": solar_power,
+            "solar_voltage_v": solar_voltage,
+            "solar_current_a": solar_current,
+            "battery_pct": battery_level,
+            "consumption_w": consumption,
+            "efficiency_pct": efficiency,
+        }
+        
+        # The samples show the average power; the wall clock says how long it lasted, even if
+        # the sampler fell behind or the ring overran and fewer samples than expected arrived
+        if self.last_update is None or now <= self.last_update:
+            window = len(samples) / self.engine.rate_hz
+        else:
+            window = now - self.last_update
+        self.last_update = now
+        generated_kwh = solar_power * window / 3.6e6
+        consumed_kwh = consumption * window / 3.6e6
+        self.ledger.add("generation", generated_kwh, now, start=now - window)
+        self.ledger.add("consumption", consumed_kwh, now, start=now - window)
+        CARBON_SAVED.inc(generated_kwh * CARBON_KG_PER_KWH)
+        for channel in ("generation", "consumption"):
+            ENERGY_TODAY.labels(channel).set(self.ledger.energy(channel, "day", now))
+        CARBON_TODAY.set(self.ledger.carbon_kg("day", now))
+        self.latest["generation_kwh_today"] = self.ledger.energy("generation", "day", now)
+        self.latest["carbon_kg_today"] = self.ledger.carbon_kg("day", now)
         
-        # Calculate carbon savings (0.4kg CO2 per kWh saved)
-        carbon_saved = (solar_power / 1000) * 0.4
-        CARBON_SAVED.inc(carbon_saved)
+        if self.store is not None:
+            self.store.append(now, solar_voltage, solar_current, solar_power, battery_level)
+            self.store.flush()
         
-        self.logger.info(f"Solar: {solar_power}W, Battery: {battery_level}%, "
-                        f"Consumption: {consumption}W, Efficiency: {efficiency}%")
+        self.logger.info(f"Solar: {solar_power:.1f}W (peak {summaries['solar_power']['max']:.1f}W), "
+                         f"Battery: {battery_level:.1f}%, Consumption: {consumption:.1f}W "
+                         f"(peak {summaries['consumption']['max']:.1f}W), Efficiency: {efficiency:.1f}% "
+                         f"over {len(samples)} samples")
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    monitor = EnergyMonitor()
+    monitor = EnergyMonitor(store=TelemetryStore(TELEMETRY_DIR))
     
     # Start Prometheus metrics server
     start_http_server(8000)
+    monitor.start_sampling()
     
     try:
         while True:
+            time.sleep(UPDATE_INTERVAL_S)
             monitor.update_metrics()
-            time.sleep(30)  # Update every 30 seconds
     except KeyboardInterrupt:
         GPIO.cleanup()
 
@@ -364,98 +617,501 @@ import numpy as np
 import tflite_runtime.interpreter as tflite
 import json
 import logging
+import os
+import struct
+import time
 from datetime import datetime
 import threading
 import queue
+from collections import OrderedDict
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Micro-batching configuration
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+# How long a /predict caller waits for its batch before giving up with 503
+PREDICT_TIMEOUT_S = float(os.environ.get("PREDICT_TIMEOUT_S", "10"))
+
+# Interpreter pool configuration
+INTERPRETER_POOL_SIZE = int(os.environ.get("INTERPRETER_POOL_SIZE", "2"))
+INTERPRETER_NUM_THREADS = int(os.environ.get("INTERPRETER_NUM_THREADS", "1"))
+
+# Inference result cache configuration
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "4096"))
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", "60"))
+CACHE_PRECISION = int(os.environ.get("CACHE_PRECISION", "2"))
+
+# Prometheus metrics
+REQUEST_LATENCY = Histogram('ml_request_latency_seconds', 'End-to-end request latency', ['endpoint'])
+STAGE_LATENCY = Histogram('ml_inference_stage_seconds', 'Inference latency by pipeline stage', ['stage'])
+REQUESTS_IN_FLIGHT = Gauge('ml_requests_in_flight', 'Requests currently being served')
+BATCH_QUEUE_DEPTH = Gauge('ml_batch_queue_depth', 'Predictions waiting to join a micro-batch')
+BATCH_SIZE = Histogram('ml_batch_size', 'Sensor vectors per interpreter invoke',
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+POOL_WAIT = Histogram('ml_interpreter_pool_wait_seconds', 'Time spent waiting for a pooled interpreter')
+INFERENCE_ERRORS = Counter('ml_inference_errors_total', 'Inference errors by type', ['type'])
+MODEL_LOAD_SECONDS = Gauge('ml_model_load_seconds', 'Time taken to load the model')
+PREDICTIONS = Counter('ml_predictions_total', 'Predictions served by outcome', ['result'])
+CACHE_EVENTS = Counter('ml_cache_events_total', 'Inference cache lookups and removals', ['event'])
+
+# Binary /predict_batch payload: uint32 rows, uint32 cols, then little-endian float32 values
+TENSOR_HEADER = struct.Struct('<II')
+
+def decode_tensor_payload(body):
+    """Decode a binary tensor payload into a (rows, cols) float32 array without copying"""
+    if len(body) < TENSOR_HEADER.size:
+        raise ValueError("Truncated tensor header")
+    rows, cols = TENSOR_HEADER.unpack_from(body)
+    if rows == 0 or cols == 0:
+        raise ValueError(f"Empty {rows}x{cols} tensor")
+    expected = TENSOR_HEADER.size + rows * cols * 4
+    if len(body) != expected:
+        raise ValueError(f"Expected {expected} bytes for a {rows}x{cols} tensor, got {len(body)}")
+    return np.frombuffer(body, dtype='<f4', count=rows * cols, offset=TENSOR_HEADER.size).reshape(rows, cols)
+
+def padded_rows(rows):
+    """Batch size an interpreter is sized for: the next power of two, so there are few shapes"""
+    return 1 << max(rows - 1, 0).bit_length()
+
+class PooledInterpreter:
+    """TensorFlow Lite interpreters for one pool slot, one allocated per input shape
+
+    Batches are padded with zero rows up to a power of two and the padded outputs are
+    dropped. Each padded shape gets its own interpreter, resized and allocated once, so
+    a micro-batch size that changes from batch to batch never reallocates tensors.
+    """
+
+    def __init__(self, model_path, num_threads):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreters = {}  # input shape -> (interpreter, input index, output index)
+        self.buffers = {}  # padded input shape -> reusable zero-padded input
+        self.allocations = 0
+        # Load the model's own shape up front, so a bad model fails at startup
+        interpreter = tflite.Interpreter(model_path=model_path, num_threads=num_threads)
+        interpreter.allocate_tensors()
+        self.allocations += 1
+        self._add(tuple(interpreter.get_input_details()[0]['shape']), interpreter)
+    
+    def _add(self, shape, interpreter):
+        entry = (interpreter, interpreter.get_input_details()[0]['index'],
+                 interpreter.get_output_details()[0]['index'])
+        self.interpreters[shape] = entry
+        return entry
+    
+    def interpreter_for(self, shape):
+        """Interpreter allocated for this input shape, created the first time it is needed"""
+        entry = self.interpreters.get(shape)
+        if entry is None:
+            interpreter = tflite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+            interpreter.resize_tensor_input(interpreter.get_input_details()[0]['index'], list(shape))
+            interpreter.allocate_tensors()
+            self.allocations += 1
+            entry = self._add(shape, interpreter)
+        return entry
+    
+    def run(self, input_data):
+        """Set input tensor, invoke and return the output rows for the real input rows"""
+        rows = len(input_data)
+        shape = (padded_rows(rows),) + tuple(input_data.shape[1:])
+        if shape != input_data.shape:
+            buffer = self.buffers.get(shape)
+            if buffer is None or buffer.dtype != input_data.dtype:
+                buffer = self.buffers[shape] = np.zeros(shape, dtype=input_data.dtype)
+            buffer[:rows] = input_data
+            buffer[rows:] = 0
+            input_data = buffer
+        interpreter, input_index, output_index = self.interpreter_for(shape)
+        interpreter.set_tensor(input_index, input_data)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)[:rows]
+
+class InterpreterPool:
+    """Fixed set of interpreters checked out by one request thread at a time"""
+
+    def __init__(self, model_path, size=INTERPRETER_POOL_SIZE, num_threads=INTERPRETER_NUM_THREADS):
+        self.size = size
+        self.num_threads = num_threads
+        self.available = queue.Queue()
+        for _ in range(size):
+            self.available.put(PooledInterpreter(model_path, num_threads))
+        self.stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+    
+    @contextmanager
+    def checkout(self):
+        """Borrow an interpreter, recording how long the caller waited for it"""
+        start = time.perf_counter()
+        interpreter = self.available.get()
+        waited = time.perf_counter() - start
+        POOL_WAIT.observe(waited)
+        with self.stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            yield interpreter
+        finally:
+            self.available.put(interpreter)
+    
+    def stats(self):
+        with self.stats_lock:
+            mean_wait = self.wait_seconds_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "size": self.size,
+                "num_threads": self.num_threads,
+                "available": self.available.qsize(),
+                "checkouts": self.checkouts,
+                "wait_ms_mean": mean_wait * 1000,
+                "wait_ms_max": self.wait_seconds_max * 1000
+            }
+
 class MLInferenceService:
     def __init__(self):
         self.model_path = "/models/sensor_anomaly_detection.tflite"
-        self.interpreter = None
-        self.input_details = None
-        self.output_details = None
+        self.pool = None
         self.load_model()
         
     def load_model(self):
         """Load TensorFlow Lite model"""
+        start = time.perf_counter()
         try:
-            self.interpreter = tflite.Interpreter(model_path=self.model_path)
-            self.interpreter.allocate_tensors()
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
-            logging.info("ML model loaded successfully")
+            self.pool = InterpreterPool(self.model_path)
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+            logging.info(f"ML model loaded successfully ({self.pool.size} interpreters)")
         except Exception as e:
+            INFERENCE_ERRORS.labels(type='model_load').inc()
             logging.error(f"Failed to load ML model: {e}")
     
     def preprocess_data(self, sensor_data):
         """Preprocess sensor data for inference"""
-        # Normalize sensor readings
-        normalized_data = np.array(sensor_data, dtype=np.float32)
-        normalized_data = (normalized_data - np.mean(normalized_data)) / np.std(normalized_data)
-        return normalized_data.reshape(1, -1)
+        # Normalize each row of sensor readings independently
+        normalized_data = np.asarray(sensor_data, dtype=np.float32)
+        if normalized_data.ndim == 1:
+            normalized_data = normalized_data.reshape(1, -1)
+        mean = np.mean(normalized_data, axis=1, keepdims=True)
+        std = np.std(normalized_data, axis=1, keepdims=True)
+        # Constant rows normalize to zeros instead of dividing by zero
+        std[std == 0] = 1.0
+        return (normalized_data - mean) / std
     
     def predict(self, sensor_data):
         """Run inference on sensor data"""
-        if self.interpreter is None:
-            return {"error": "Model not loaded"}
+        return self.predict_batch([sensor_data])[0]
+    
+    def predict_many(self, rows, chunk_size=BATCH_MAX_SIZE):
+        """Score many sensor vectors, returning results in request order"""
+        results = [None] * len(rows)
+        if isinstance(rows, np.ndarray):
+            # Decoded tensors are scored as slices of the original buffer
+            for start in range(0, len(rows), chunk_size):
+                results[start:start + chunk_size] = self.predict_batch(rows[start:start + chunk_size])
+            return results
+        
+        groups = {}
+        for i, row in enumerate(rows):
+            groups.setdefault(len(row), []).append(i)
+        for indices in groups.values():
+            for start in range(0, len(indices), chunk_size):
+                chunk = indices[start:start + chunk_size]
+                for i, result in zip(chunk, self.predict_batch([rows[i] for i in chunk])):
+                    results[i] = result
+        return results
+    
+    def predict_batch(self, batch):
+        """Run a single inference over a batch of sensor vectors"""
+        if self.pool is None:
+            INFERENCE_ERRORS.labels(type='model_not_loaded').inc()
+            return [{"error": "Model not loaded"} for _ in batch]
         
         try:
             # Preprocess input data
-            input_data = self.preprocess_data(sensor_data)
-            
-            # Set input tensor
-            self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+            with STAGE_LATENCY.labels(stage='preprocess').time():
+                input_data = self.preprocess_data(batch)
+            BATCH_SIZE.observe(len(input_data))
             
-            # Run inference
-            self.interpreter.invoke()
-            
-            # Get output
-            output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
+            # Run inference on a checked-out interpreter
+            with self.pool.checkout() as interpreter:
+                with STAGE_LATENCY.labels(stage='invoke').time():
+                    output_data = interpreter.run(input_data)
             
             # Process results
-            anomaly_score = float(output_data[0][0])
-            is_anomaly = anomaly_score > 0.5
-            
-            return {
-                "anomaly_score": anomaly_score,
-                "is_anomaly": is_anomaly,
-                "timestamp": datetime.now().isoformat(),
-                "confidence": float(abs(anomaly_score - 0.5) * 2)
-            }
+            postprocess_start = time.perf_counter()
+            timestamp = datetime.now().isoformat()
+            results = []
+            for anomaly_score in output_data[:, 0].tolist():
+                results.append({
+                    "anomaly_score": anomaly_score,
+                    "is_anomaly": anomaly_score > 0.5,
+                    "timestamp": timestamp,
+                    "confidence": float(abs(anomaly_score - 0.5) * 2)
+                })
+            STAGE_LATENCY.labels(stage='postprocess').observe(time.perf_counter() - postprocess_start)
+            return results
         except Exception as e:
+            INFERENCE_ERRORS.labels(type=type(e).__name__).inc()
             logging.error(f"Inference error: {e}")
-            return {"error": str(e)}
+            return [{"error": str(e)} for _ in batch]
+
+class PendingPrediction:
+    def __init__(self, sensor_data):
+        self.sensor_data = sensor_data
+        self.result = None
+        self.done = threading.Event()
+
+class MicroBatcher:
+    """Gather concurrent predictions into one batched invoke"""
+
+    def __init__(self, service, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                 workers=INTERPRETER_POOL_SIZE):
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        # One worker per pooled interpreter so batches are invoked in parallel
+        self.workers = [threading.Thread(target=self.run, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+    
+    def submit(self, sensor_data, timeout=PREDICT_TIMEOUT_S):
+        """Queue sensor data and wait for its share of the batch result"""
+        pending = PendingPrediction(sensor_data)
+        self.requests.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"No inference result within {timeout} s")
+        return pending.result
+    
+    def collect_batch(self):
+        """Block for one request, then gather more until full or the window closes"""
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def run(self):
+        while True:
+            batch = self.collect_batch()
+            try:
+                # Vectors of different lengths cannot share one input tensor
+                groups = {}
+                for pending in batch:
+                    groups.setdefault(len(pending.sensor_data), []).append(pending)
+                for group in groups.values():
+                    results = self.service.predict_batch([p.sensor_data for p in group])
+                    for pending, result in zip(group, results):
+                        pending.result = result
+            except Exception as e:
+                INFERENCE_ERRORS.labels(type=type(e).__name__).inc()
+                logging.error(f"Batch inference error: {e}")
+                for pending in batch:
+                    if pending.result is None:
+                        pending.result = {"error": str(e)}
+            finally:
+                # Release every caller, whatever happened to the batch
+                for pending in batch:
+                    pending.done.set()
+
+class InferenceCache:
+    """LRU cache with TTL for results keyed on quantized sensor vectors"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS,
+                 precision=CACHE_PRECISION):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+    
+    def key(self, sensor_data):
+        """Quantize readings to the configured number of decimals"""
+        # Adding 0.0 folds -0.0 into 0.0 so both produce the same bytes
+        quantized = np.round(np.asarray(sensor_data, dtype=np.float64), self.precision) + 0.0
+        return quantized.tobytes()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_EVENTS.labels(event='miss').inc()
+                return None
+            expires_at, result = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                CACHE_EVENTS.labels(event='expiration').inc()
+                CACHE_EVENTS.labels(event='miss').inc()
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            CACHE_EVENTS.labels(event='hit').inc()
+        return dict(result, timestamp=datetime.now().isoformat(), cached=True)
+    
+    def put(self, key, result):
+        if "error" in result:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+                CACHE_EVENTS.labels(event='eviction').inc()
+    
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
 
 # Initialize service
 ml_service = MLInferenceService()
+batcher = MicroBatcher(ml_service)
+inference_cache = InferenceCache()
+BATCH_QUEUE_DEPTH.set_function(batcher.requests.qsize)
+
+def predict_cached(sensor_data, bypass_cache=False):
+    """Serve a single prediction from the cache, batching the misses"""
+    if bypass_cache or not inference_cache.enabled:
+        return batcher.submit(sensor_data)
+    key = inference_cache.key(sensor_data)
+    result = inference_cache.get(key)
+    if result is None:
+        result = batcher.submit(sensor_data)
+        inference_cache.put(key, result)
+    return result
+
+def predict_many_cached(rows, bypass_cache=False):
+    """Serve bulk predictions from the cache, scoring only the misses"""
+    if bypass_cache or not inference_cache.enabled:
+        return ml_service.predict_many(rows)
+    keys = [inference_cache.key(row) for row in rows]
+    results = [inference_cache.get(key) for key in keys]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        if isinstance(rows, np.ndarray):
+            missed_rows = rows[misses]
+        else:
+            missed_rows = [rows[i] for i in misses]
+        for i, result in zip(misses, ml_service.predict_many(missed_rows)):
+            inference_cache.put(keys[i], result)
+            results[i] = result
+    return results
+
+def record_predictions(results):
+    """Count served predictions by outcome; the anomaly rate is derived in PromQL"""
+    for result in results:
+        if "error" in result:
+            continue
+        PREDICTIONS.labels(result='anomaly' if result['is_anomaly'] else 'normal').inc()
+
+def is_sensor_vector(sensor_data):
+    """A non-empty list of numbers, the only shape /predict can batch"""
+    return (isinstance(sensor_data, list) and len(sensor_data) > 0
+            and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in sensor_data))
+
+def is_sensor_matrix(sensor_data):
+    """A non-empty list of equally long sensor vectors, the only shape /predict_batch can score"""
+    return (isinstance(sensor_data, list) and len(sensor_data) > 0
+            and all(is_sensor_vector(row) and len(row) == len(sensor_data[0]) for row in sensor_data))
+
+def bypass_requested(data=None):
+    """Per-request cache bypass via JSON field or ?bypass_cache=1"""
+    if data and data.get('bypass_cache'):
+        return True
+    return request.args.get('bypass_cache', '').lower() in ('1', 'true', 'yes')
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "service": "ml-inference"})
+    status = {"status": "healthy", "service": "ml-inference"}
+    if ml_service.pool is not None:
+        status["interpreter_pool"] = ml_service.pool.stats()
+    status["inference_cache"] = inference_cache.stats()
+    return jsonify(status)
 
 @app.route('/predict', methods=['POST'])
+@REQUESTS_IN_FLIGHT.track_inprogress()
+@REQUEST_LATENCY.labels(endpoint='predict').time()
 def predict():
     try:
-        data = request.get_json()
-        sensor_data = data.get('sensor_data', [])
+        data = request.get_json(silent=True)
+        sensor_data = data.get('sensor_data') if isinstance(data, dict) else None
         
-        if not sensor_data:
-            return jsonify({"error": "No sensor data provided"}), 400
+        if not is_sensor_vector(sensor_data):
+            INFERENCE_ERRORS.labels(type='bad_request').inc()
+            return jsonify({"error": "sensor_data must be a non-empty list of numbers"}), 400
         
-        result = ml_service.predict(sensor_data)
+        result = predict_cached(sensor_data, bypass_requested(data))
+        record_predictions([result])
         return jsonify(result)
     
+    except TimeoutError as e:
+        INFERENCE_ERRORS.labels(type='timeout').inc()
+        logging.error(f"Prediction timed out: {e}")
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
+        INFERENCE_ERRORS.labels(type=type(e).__name__).inc()
         logging.error(f"Prediction error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/predict_batch', methods=['POST'])
+@REQUESTS_IN_FLIGHT.track_inprogress()
+@REQUEST_LATENCY.labels(endpoint='predict_batch').time()
+def predict_batch():
+    try:
+        data = None
+        if request.mimetype == 'application/octet-stream':
+            sensor_data = decode_tensor_payload(request.get_data())
+        else:
+            data = request.get_json(silent=True)
+            sensor_data = data.get('sensor_data') if isinstance(data, dict) else None
+            if not is_sensor_matrix(sensor_data):
+                INFERENCE_ERRORS.labels(type='bad_request').inc()
+                return jsonify({"error": "sensor_data must be a non-empty list of equally long lists of numbers"}), 400
+        
+        results = predict_many_cached(sensor_data, bypass_requested(data))
+        record_predictions(results)
+        return jsonify({"results": results})
+    
+    except ValueError as e:
+        INFERENCE_ERRORS.labels(type='bad_request').inc()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        INFERENCE_ERRORS.labels(type=type(e).__name__).inc()
+        logging.error(f"Batch prediction error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/metrics', methods=['GET'])
 def metrics():
     # Prometheus metrics endpoint
-    return "# ML Inference Service Metrics\n", 200, {'Content-Type': 'text/plain'}
+    return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=False)
@@ -475,23 +1131,358 @@ import asyncio
 import aiohttp
 import json
 import logging
+from collections import OrderedDict
 from datetime import datetime
+import numpy as np
 import paho.mqtt.client as mqtt
 import redis
 import os
+import random
+import struct
+import threading
+import time
+from prometheus_client import start_http_server, Counter, Gauge, Histogram
+
+REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
+MQTT_BROKER = os.environ.get("MQTT_BROKER", "mqtt-broker")
+ML_SERVICE_URL = os.environ.get("ML_SERVICE_URL", "http://ml-inference:8080")
+
+# Pipeline configuration
+QUEUE_SIZE = int(os.environ.get("COLLECTOR_QUEUE_SIZE", "10000"))
+QUEUE_POLICY = os.environ.get("COLLECTOR_QUEUE_POLICY", "drop_oldest")  # block, drop_oldest, drop_newest
+WORKER_COUNT = int(os.environ.get("COLLECTOR_WORKERS", "8"))
+ML_BATCH_SIZE = int(os.environ.get("COLLECTOR_ML_BATCH_SIZE", "32"))
+REDIS_FLUSH_INTERVAL_MS = float(os.environ.get("REDIS_FLUSH_INTERVAL_MS", "50"))
+REDIS_FLUSH_MAX_WRITES = int(os.environ.get("REDIS_FLUSH_MAX_WRITES", "500"))
+METRICS_PORT = int(os.environ.get("COLLECTOR_METRICS_PORT", "8000"))
+FEATURE_WINDOW = int(os.environ.get("FEATURE_WINDOW", "32"))
+FEATURE_MIN_READINGS = int(os.environ.get("FEATURE_MIN_READINGS", "8"))
+FEATURE_MAX_DEVICES = int(os.environ.get("FEATURE_MAX_DEVICES", "10000"))
+GATE_Z_THRESHOLD = float(os.environ.get("GATE_Z_THRESHOLD", "3.0"))
+GATE_ALPHA = float(os.environ.get("GATE_ALPHA", "0.05"))
+GATE_SAMPLE_RATE = float(os.environ.get("GATE_SAMPLE_RATE", "0.02"))
+GATE_WARMUP = int(os.environ.get("GATE_WARMUP", "20"))
+DEADBAND_ABS = float(os.environ.get("DEADBAND_ABS", "0.0"))
+DEADBAND_REL = float(os.environ.get("DEADBAND_REL", "0.0"))
+DEADBAND_HEARTBEAT_S = float(os.environ.get("DEADBAND_HEARTBEAT_S", "60"))
+# Payload fields holding sensor values; timestamps, sequence numbers and the like are not compared
+DEADBAND_FIELDS = tuple(field.strip() for field in os.environ.get(
+    "DEADBAND_FIELDS", "temperature,humidity,pressure,vibration,value,power,voltage,current,soc").split(",")
+    if field.strip())
+# Per-topic-prefix overrides, e.g. {"sensors/temperature/": {"abs": 0.1, "heartbeat": 300}};
+# an override may also list its own "fields"
+DEADBAND_OVERRIDES = json.loads(os.environ.get("DEADBAND_OVERRIDES", "{}"))
+
+# Binary /predict_batch payload: uint32 rows, uint32 cols, then little-endian float32 values
+TENSOR_HEADER = struct.Struct('<II')
+
+# Prometheus metrics
+REDIS_FLUSH_SECONDS = Histogram('collector_redis_flush_seconds', 'Redis pipeline flush latency')
+REDIS_FLUSH_SIZE = Histogram('collector_redis_flush_commands', 'Commands sent per Redis pipeline flush',
+                             buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+REDIS_COALESCED = Counter('collector_redis_coalesced_writes_total', 'Writes superseded within one flush window')
+REDIS_FLUSH_ERRORS = Counter('collector_redis_flush_errors_total', 'Failed Redis pipeline flushes')
+DEADBAND_READINGS = Counter('collector_deadband_readings_total', 'Readings by deadband outcome', ['result'])
+DEADBAND_RATIO = Gauge('collector_deadband_compression_ratio', 'Readings received per reading stored')
+GATE_DECISIONS = Counter('collector_gate_readings_total', 'Sensor readings by pre-filter decision', ['decision'])
+
+class RedisWriteBehind:
+    """Buffer Redis writes and flush them as pipelines on a short window or size threshold"""
+
+    def __init__(self, redis_client, flush_interval_ms=REDIS_FLUSH_INTERVAL_MS,
+                 max_writes=REDIS_FLUSH_MAX_WRITES):
+        self.redis_client = redis_client
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_writes = max_writes
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        # Last value wins for a key written more than once in a window
+        self.pending_sets = {}
+        self.pending_pushes = []
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def setex(self, key, ttl, value):
+        with self.lock:
+            if key in self.pending_sets:
+                REDIS_COALESCED.inc()
+            self.pending_sets[key] = (ttl, value)
+            full = len(self.pending_sets) + len(self.pending_pushes) >= self.max_writes
+        if full:
+            self.wakeup.set()
+    
+    def lpush(self, key, value):
+        with self.lock:
+            self.pending_pushes.append((key, value))
+            full = len(self.pending_sets) + len(self.pending_pushes) >= self.max_writes
+        if full:
+            self.wakeup.set()
+    
+    def flush(self):
+        """Write everything buffered so far in a single pipeline round trip"""
+        with self.lock:
+            sets, self.pending_sets = self.pending_sets, {}
+            pushes, self.pending_pushes = self.pending_pushes, []
+        if not sets and not pushes:
+            return
+        
+        start = time.perf_counter()
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key, (ttl, value) in sets.items():
+            pipe.setex(key, ttl, value)
+        for key, value in pushes:
+            pipe.lpush(key, value)
+        pipe.execute()
+        REDIS_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        REDIS_FLUSH_SIZE.observe(len(sets) + len(pushes))
+    
+    def _flush_logged(self):
+        try:
+            self.flush()
+        except Exception as e:
+            REDIS_FLUSH_ERRORS.inc()
+            logging.error(f"Redis flush failed: {e}")
+    
+    def run(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self._flush_logged()
+    
+    def stop(self):
+        """Stop the flush thread and write whatever is still buffered"""
+        self.stopping.set()
+        self.wakeup.set()
+        self.thread.join()
+        self._flush_logged()
+
+class SensorWindowStore:
+    """Per-topic ring buffers of recent readings with incremental mean and variance"""
+
+    def __init__(self, window=FEATURE_WINDOW, max_devices=FEATURE_MAX_DEVICES):
+        self.window = window
+        self.max_devices = max_devices
+        # One preallocated row per device keeps memory bounded
+        self.values = np.zeros((max_devices, window), dtype=np.float64)
+        self.positions = np.zeros(max_devices, dtype=np.int64)
+        self.counts = np.zeros(max_devices, dtype=np.int64)
+        self.means = np.zeros(max_devices, dtype=np.float64)
+        self.m2 = np.zeros(max_devices, dtype=np.float64)
+        self.offsets = np.arange(window)
+        self.rows = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def __contains__(self, topic):
+        return topic in self.rows
+    
+    def row_for(self, topic):
+        """Return the topic's row, recycling the least recently updated one when full"""
+        row = self.rows.get(topic)
+        if row is not None:
+            self.rows.move_to_end(topic)
+            return row
+        if len(self.rows) < self.max_devices:
+            row = len(self.rows)
+        else:
+            _, row = self.rows.popitem(last=False)
+        self.positions[row] = 0
+        self.counts[row] = 0
+        self.means[row] = 0.0
+        self.m2[row] = 0.0
+        self.rows[topic] = row
+        return row
+    
+    def append(self, topic, value):
+        """Add a reading, updating the window statistics in O(1)"""
+        with self.lock:
+            row = self.row_for(topic)
+            pos = self.positions[row]
+            count = self.counts[row]
+            mean = self.means[row]
+            if count < self.window:
+                # Welford update while the window fills
+                count += 1
+                delta = value - mean
+                mean += delta / count
+                self.m2[row] += delta * (value - mean)
+                self.counts[row] = count
+            else:
+                # Replace the oldest reading in a full window
+                old = self.values[row, pos]
+                new_mean = mean + (value - old) / count
+                self.m2[row] = max(self.m2[row] + (value - old) * (value - new_mean + old - mean), 0.0)
+                mean = new_mean
+            self.means[row] = mean
+            self.values[row, pos] = value
+            self.positions[row] = (pos + 1) % self.window
+    
+    def features_batch(self, topics, min_readings=FEATURE_MIN_READINGS):
+        """Build normalized fixed-length windows for topics with enough history"""
+        with self.lock:
+            kept = [topic for topic in topics
+                    if topic in self.rows and self.counts[self.rows[topic]] >= min_readings]
+            if not kept:
+                return kept, None
+            rows = np.fromiter((self.rows[topic] for topic in kept), dtype=np.int64, count=len(kept))
+            # Oldest reading first; unfilled slots lead the window
+            order = (self.positions[rows, None] + self.offsets) % self.window
+            windows = self.values[rows[:, None], order]
+            counts = self.counts[rows]
+            means = self.means[rows]
+            stds = np.sqrt(self.m2[rows] / counts)
+        
+        stds[stds == 0] = 1.0
+        features = (windows - means[:, None]) / stds[:, None]
+        features[self.offsets < (self.window - counts)[:, None]] = 0.0
+        return kept, features.astype('<f4')
+
+class DeadbandFilter:
+    """Drop readings that have not left their per-topic deadband since the last stored value"""
+
+    def __init__(self, abs_threshold=DEADBAND_ABS, rel_threshold=DEADBAND_REL,
+                 heartbeat_s=DEADBAND_HEARTBEAT_S, overrides=DEADBAND_OVERRIDES, fields=DEADBAND_FIELDS):
+        self.defaults = {"abs": abs_threshold, "rel": rel_threshold, "heartbeat": heartbeat_s, "fields": fields}
+        # Longest matching topic prefix wins
+        self.overrides = sorted(overrides.items(), key=lambda item: len(item[0]), reverse=True)
+        self.settings = {}
+        self.last = {}
+        self.received = 0
+        self.stored = 0
+        self.stored_counter = DEADBAND_READINGS.labels(result='stored')
+        self.suppressed_counter = DEADBAND_READINGS.labels(result='suppressed')
+    
+    def settings_for(self, topic):
+        settings = self.settings.get(topic)
+        if settings is None:
+            settings = dict(self.defaults)
+            for prefix, override in self.overrides:
+                if topic.startswith(prefix):
+                    settings.update(override)
+                    break
+            settings = self.settings[topic] = (settings["abs"], settings["rel"], settings["heartbeat"],
+                                               tuple(settings["fields"]))
+        return settings
+    
+    def moved(self, values, previous, abs_threshold, rel_threshold):
+        if values.keys() != previous.keys():
+            return True
+        for field, value in values.items():
+            old = previous[field]
+            if abs(value - old) > max(abs_threshold, rel_threshold * abs(old)):
+                return True
+        return False
+    
+    def passes(self, topic, payload, now=None):
+        """Return True when the reading should be stored and forwarded"""
+        now = time.monotonic() if now is None else now
+        self.received += 1
+        abs_threshold, rel_threshold, heartbeat_s, fields = self.settings_for(topic)
+        values = {}
+        for field in fields:
+            value = payload.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[field] = value
+        last = self.last.get(topic)
+        # Readings with no known value field cannot be judged, so they always pass
+        if (values and last is not None and now - last[1] < heartbeat_s
+                and not self.moved(values, last[0], abs_threshold, rel_threshold)):
+            self.suppressed_counter.inc()
+            return False
+        
+        self.last[topic] = (values, now)
+        self.stored += 1
+        self.stored_counter.inc()
+        return True
+    
+    def compression_ratio(self):
+        return self.received / self.stored if self.stored else 1.0
+    
+    def stats(self):
+        return {
+            "received": self.received,
+            "stored": self.stored,
+            "suppressed": self.received - self.stored,
+            "compression_ratio": self.compression_ratio()
+        }
+
+class AnomalyGate:
+    """Per-sensor EWMA z-score band that decides which readings reach the model"""
+
+    # Everything except 'suppressed' is forwarded to the ML service
+    DECISIONS = ('warmup', 'outlier', 'sampled', 'suppressed')
+
+    def __init__(self, z_threshold=GATE_Z_THRESHOLD, alpha=GATE_ALPHA,
+                 sample_rate=GATE_SAMPLE_RATE, warmup=GATE_WARMUP):
+        self.z_squared = z_threshold * z_threshold
+        self.alpha = alpha
+        self.sample_rate = sample_rate
+        self.warmup = warmup
+        self.random = random.Random()
+        # topic -> [count, ewma mean, ewma variance]
+        self.state = {}
+        self.counts = dict.fromkeys(self.DECISIONS, 0)
+        self.counters = {decision: GATE_DECISIONS.labels(decision=decision) for decision in self.DECISIONS}
+    
+    def check(self, topic, value):
+        """Classify a reading against the band, then fold it into the sensor's state"""
+        state = self.state.get(topic)
+        if state is None:
+            state = self.state[topic] = [0, value, 0.0]
+        count, mean, variance = state
+        deviation = value - mean
+        
+        if count < self.warmup:
+            decision = 'warmup'
+        elif deviation * deviation > self.z_squared * variance:
+            decision = 'outlier'
+        elif self.random.random() < self.sample_rate:
+            decision = 'sampled'  # normal traffic kept for drift checks
+        else:
+            decision = 'suppressed'
+        
+        increment = self.alpha * deviation
+        state[0] = count + 1
+        state[1] = mean + increment
+        state[2] = (1 - self.alpha) * (variance + deviation * increment)
+        
+        self.counts[decision] += 1
+        self.counters[decision].inc()
+        return decision != 'suppressed'
+    
+    def stats(self):
+        forwarded = sum(self.counts.values()) - self.counts['suppressed']
+        return dict(self.counts, forwarded=forwarded)
 
 class IoTDataCollector:
-    def __init__(self):
+    def __init__(self, queue_size=QUEUE_SIZE, queue_policy=QUEUE_POLICY,
+                 workers=WORKER_COUNT, ml_batch_size=ML_BATCH_SIZE):
+        if queue_policy not in ('block', 'drop_oldest', 'drop_newest'):
+            raise ValueError(f"Unknown queue policy: {queue_policy}")
         self.mqtt_client = mqtt.Client()
-        self.redis_client = redis.Redis(host='redis', port=6379, db=0)
-        self.ml_service_url = "http://ml-inference:8080/predict"
+        self.redis_client = redis.Redis(host=REDIS_HOST, port=6379, db=0)
+        self.redis_writer = RedisWriteBehind(self.redis_client)
+        self.feature_store = SensorWindowStore()
+        self.gate = AnomalyGate()
+        self.deadband = DeadbandFilter()
+        DEADBAND_RATIO.set_function(self.deadband.compression_ratio)
+        self.ml_service_url = f"{ML_SERVICE_URL}/predict_batch"
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.worker_count = workers
+        self.ml_batch_size = ml_batch_size
+        self.loop = None
+        self.queue = None
+        self.session = None
+        self.enqueued = 0
+        self.dropped = 0
         self.setup_mqtt()
         
     def setup_mqtt(self):
         """Setup MQTT client for sensor data"""
         self.mqtt_client.on_connect = self.on_connect
         self.mqtt_client.on_message = self.on_message
-        self.mqtt_client.connect("mqtt-broker", 1883, 60)
+        self.mqtt_client.connect(MQTT_BROKER, 1883, 60)
         
     def on_connect(self, client, userdata, flags, rc):
         logging.info(f"MQTT connected with result code {rc}")
@@ -513,59 +1504,109 @@ class IoTDataCollector:
             topic = msg.topic
             payload = json.loads(msg.payload.decode())
             
+            # Every sensor reading feeds its window, even when unchanged
+            value = None
+            if topic.startswith('sensors/'):
+                value = self.extract_sensor_value(topic, payload)
+                if value is not None:
+                    value = float(value)
+                    self.feature_store.append(topic, value)
+            
+            # Readings inside the deadband are neither stored nor forwarded
+            if not self.deadband.passes(topic, payload):
+                return
+            
             # Add timestamp and topic to payload
             payload['timestamp'] = datetime.now().isoformat()
             payload['topic'] = topic
             
             # Store in Redis for real-time access
-            self.redis_client.setex(
+            self.redis_writer.setex(
                 f"sensor_data:{topic}", 
                 300,  # 5 minute TTL
                 json.dumps(payload)
             )
             
-            # Send to ML inference if it's sensor data
-            if topic.startswith('sensors/'):
-                asyncio.create_task(self.send_to_ml_service(payload))
+            # Obviously normal readings never leave the collector
+            if value is not None and self.gate.check(topic, value):
+                self.submit(payload)
                 
-            logging.info(f"Processed message from {topic}")
+            logging.debug(f"Processed message from {topic}")
             
         except Exception as e:
             logging.error(f"Error processing message: {e}")
     
-    async def send_to_ml_service(self, sensor_data):
-        """Send sensor data to ML inference service"""
+    def submit(self, payload):
+        """Pass a reading from the MQTT network thread to the event loop"""
+        if self.queue_policy == 'block':
+            # Blocking the paho thread pushes backpressure onto the broker connection
+            asyncio.run_coroutine_threadsafe(self.queue.put(payload), self.loop).result()
+            self.enqueued += 1
+        else:
+            self.loop.call_soon_threadsafe(self.enqueue_nowait, payload)
+    
+    def enqueue_nowait(self, payload):
+        """Enqueue on the event loop, applying the drop policy when full"""
+        if self.queue.full():
+            self.dropped += 1
+            if self.queue_policy == 'drop_newest':
+                return
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self.queue.put_nowait(payload)
+        self.enqueued += 1
+    
+    async def worker(self):
+        """Drain queued readings and score them in batches"""
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.ml_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self.send_to_ml_service(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+    
+    def extract_sensor_value(self, topic, sensor_data):
+        """Extract the numeric reading for a sensors/<kind>/<device> topic"""
+        kind = topic.split('/')[1]
+        if kind in sensor_data:
+            return sensor_data[kind]
+        for field in ('temperature', 'humidity', 'pressure', 'vibration'):
+            if field in sensor_data:
+                return sensor_data[field]
+        return None
+    
+    async def send_to_ml_service(self, batch):
+        """Send windowed features for a batch of sensor readings to the ML inference service"""
         try:
-            # Extract numeric values for ML processing
-            sensor_values = []
-            if 'temperature' in sensor_data:
-                sensor_values.append(sensor_data['temperature'])
-            if 'humidity' in sensor_data:
-                sensor_values.append(sensor_data['humidity'])
-            if 'pressure' in sensor_data:
-                sensor_values.append(sensor_data['pressure'])
-            if 'vibration' in sensor_data:
-                sensor_values.append(sensor_data['vibration'])
+            # Only the latest reading per topic matters once its window is built
+            latest = {sensor_data['topic']: sensor_data for sensor_data in batch}
+            topics, features = self.feature_store.features_batch(list(latest))
             
-            if sensor_values:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        self.ml_service_url,
-                        json={"sensor_data": sensor_values}
-                    ) as response:
-                        result = await response.json()
-                        
-                        # Store ML results
-                        self.redis_client.setex(
-                            f"ml_results:{sensor_data['topic']}", 
-                            300,
-                            json.dumps(result)
-                        )
+            if topics:
+                body = TENSOR_HEADER.pack(*features.shape) + features.tobytes()
+                async with self.session.post(
+                    self.ml_service_url,
+                    data=body,
+                    headers={"Content-Type": "application/octet-stream"}
+                ) as response:
+                    results = (await response.json())['results']
+                
+                for topic, result in zip(topics, results):
+                    sensor_data = latest[topic]
+                    # Store ML results
+                    self.redis_writer.setex(
+                        f"ml_results:{sensor_data['topic']}", 
+                        300,
+                        json.dumps(result)
+                    )
+                    
+                    # Alert if anomaly detected
+                    if result.get('is_anomaly'):
+                        await self.send_alert(sensor_data, result)
                         
-                        # Alert if anomaly detected
-                        if result.get('is_anomaly'):
-                            await self.send_alert(sensor_data, result)
-                            
         except Exception as e:
             logging.error(f"Error sending to ML service: {e}")
     
@@ -580,15 +1621,37 @@ class IoTDataCollector:
         }
         
         # Store alert in Redis
-        self.redis_client.lpush("alerts", json.dumps(alert))
+        self.redis_writer.lpush("alerts", json.dumps(alert))
         
         # Send to alerting service (webhook, Slack, etc.)
         logging.warning(f"ANOMALY DETECTED: {alert}")
     
+    async def serve(self):
+        """Run the ML workers and MQTT network thread around one event loop"""
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        # One pooled keep-alive session shared by every worker
+        connector = aiohttp.TCPConnector(limit=self.worker_count, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            self.session = session
+            workers = [asyncio.create_task(self.worker()) for _ in range(self.worker_count)]
+            self.mqtt_client.loop_start()
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                self.mqtt_client.loop_stop()
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                # Buffered readings and alerts would otherwise be lost on every restart
+                self.redis_writer.stop()
+    
     def run(self):
         """Start the data collection service"""
         logging.info("Starting IoT Data Collector")
-        self.mqtt_client.loop_forever()
+        start_http_server(METRICS_PORT)
+        asyncio.run(self.serve())
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -634,6 +1697,23 @@ spec:
         image: greenedge/ml-inference:v1.2.0
         ports:
         - containerPort: 8080
+        env:
+        - name: BATCH_MAX_SIZE
+          value: "32"
+        - name: BATCH_MAX_WAIT_MS
+          value: "5"
+        - name: PREDICT_TIMEOUT_S
+          value: "10"
+        - name: INTERPRETER_POOL_SIZE
+          value: "2"
+        - name: INTERPRETER_NUM_THREADS
+          value: "1"
+        - name: CACHE_MAX_ENTRIES
+          value: "4096"
+        - name: CACHE_TTL_SECONDS
+          value: "60"
+        - name: CACHE_PRECISION
+          value: "2"
         resources:
           requests:
             cpu: 100m
@@ -677,10 +1757,15 @@ spec:
     metadata:
       labels:
         app: iot-pipeline
+      annotations:
+        prometheus.io/scrape: "true"
+        prometheus.io/port: "8000"
     spec:
       containers:
       - name: data-collector
         image: greenedge/iot-pipeline:v1.1.0
+        ports:
+        - containerPort: 8000
         env:
         - name: REDIS_HOST
           value: "redis"
@@ -688,6 +1773,34 @@ spec:
           value: "mqtt-broker"
         - name: ML_SERVICE_URL
           value: "http://ml-inference:8080"
+        - name: COLLECTOR_QUEUE_SIZE
+          value: "10000"
+        - name: COLLECTOR_QUEUE_POLICY
+          value: "drop_oldest"
+        - name: COLLECTOR_WORKERS
+          value: "8"
+        - name: COLLECTOR_ML_BATCH_SIZE
+          value: "32"
+        - name: REDIS_FLUSH_INTERVAL_MS
+          value: "50"
+        - name: REDIS_FLUSH_MAX_WRITES
+          value: "500"
+        - name: FEATURE_WINDOW
+          value: "32"
+        - name: FEATURE_MAX_DEVICES
+          value: "10000"
+        - name: GATE_Z_THRESHOLD
+          value: "3.0"
+        - name: GATE_SAMPLE_RATE
+          value: "0.02"
+        - name: DEADBAND_ABS
+          value: "0.0"
+        - name: DEADBAND_REL
+          value: "0.0"
+        - name: DEADBAND_HEARTBEAT_S
+          value: "60"
+        - name: DEADBAND_FIELDS
+          value: "temperature,humidity,pressure,vibration,value,power,voltage,current,soc"
         resources:
           requests:
             cpu: 50m
@@ -721,22 +1834,37 @@ spec:
         image: greenedge/energy-monitor:v1.0.0
         ports:
         - containerPort: 8000
+        env:
+        - name: ADC_BACKEND
+          value: "spidev"
+        - name: ADC_SAMPLE_RATE_HZ
+          value: "1000"
+        - name: ADC_BLOCK_SIZE
+          value: "50"
+        - name: UPDATE_INTERVAL_S
+          value: "30"
         resources:
           requests:
-            cpu: 50m
-            memory: 32Mi
-          limits:
             cpu: 100m
+            memory: 48Mi
+          limits:
+            cpu: 250m
             memory: 128Mi
         volumeMounts:
         - name: dev
           mountPath: /dev
+        - name: telemetry
+          mountPath: /var/lib/greenedge/telemetry
         securityContext:
           privileged: true
       volumes:
       - name: dev
         hostPath:
           path: /dev
+      - name: telemetry
+        hostPath:
+          path: /var/lib/greenedge/telemetry
+          type: DirectoryOrCreate
 
 #==============================================================================
 # 7. INFRASTRUCTURE AUTOMATION
@@ -871,6 +1999,15 @@ groups:
       summary: "Pod crash looping"
       description: "Pod {{ $labels.pod }} is crash looping"
 
+  - alert: HighAnomalyRate
+    expr: sum(rate(ml_predictions_total{result="anomaly"}[10m])) / sum(rate(ml_predictions_total[10m])) > 0.2
+    for: 10m
+    labels:
+      severity: warning
+    annotations:
+      summary: "High sensor anomaly rate"
+      description: "More than 20% of ML predictions have been anomalies for 10 minutes"
+
   - alert: NodeDown
     expr: up{job="kubernetes-nodes"} == 0
     for: 1m
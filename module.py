@@ -1,12 +1,15 @@
 # solar_monitor.py
 import random
 import time
+from event_bus import bus, SensorSample
 
 class SolarMonitor:
-    def __init__(self):
+    def __init__(self, store=None, events=None):
         self.voltage = 0.0
         self.current = 0.0
         self.power = 0.0
+        self.store = store  # optional TelemetryStore
+        self.events = bus if events is None else events
 
     def read_sensors(self):
         # Simulate sensor reading
@@ -15,12 +18,21 @@ class SolarMonitor:
         self.power = round(self.voltage * self.current, 2)   # Watts
         return self.voltage, self.current, self.power
 
-    def log_power(self):
-        v, c, p = self.read_sensors()
-        print(f"Voltage: {v}V, Current: {c}A, Power: {p}W")
-        # Here you can add code to log to a file or database
+    def log_power(self, reading=None):
+        """Log and store a reading; pass a SensorSampler reading to avoid a fresh sensor read"""
+        if reading is None:
+            v, c, p = self.read_sensors()
+            now = time.time()
+        else:
+            now, v, c, p = reading
+        if self.events.active:
+            self.events.publish(SensorSample(now, v, c, p))
+        if self.store is not None:
+            self.store.append(now, v, c, p)
 
 if __name__ == "__main__":
+    from event_bus import ConsoleSink
+    bus.subscribe(ConsoleSink())
     monitor = SolarMonitor()
     while True:
         monitor.log_power()
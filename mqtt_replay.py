@@ -0,0 +1,315 @@
+# mqtt_replay.py
+"""Record MQTT sensor traffic and replay it into the data collector as load
+
+Recordings are a compact binary stream: each message is a fixed header with the
+microseconds since the previous message, a topic index and the payload length.
+A topic's name follows its header the first time it appears. Paths ending in .gz
+are gzip-compressed.
+"""
+import gzip
+import json
+import struct
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+MAGIC = b"GEMQ\x01"
+# Microseconds since the previous message, topic index, payload length
+RECORD = struct.Struct('<IHI')
+TOPIC_LENGTH = struct.Struct('<H')
+MAX_DELTA_US = 2**32 - 1
+# The collector's subscriptions, widened to every sensor kind and energy source
+TOPICS = ("sensors/+/+", "energy/+/+")
+PERCENTILES = (50, 90, 99)
+
+Recorded = namedtuple("Recorded", "offset topic payload")
+
+def open_file(path, mode):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+class RecordingWriter:
+    def __init__(self, path):
+        self.file = open_file(path, "wb")
+        self.file.write(MAGIC)
+        self.topics = {}
+        self.last = None
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def write(self, topic, payload, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            delta_us = 0 if self.last is None else round((timestamp - self.last) * 1e6)
+            self.last = timestamp
+            index = self.topics.get(topic)
+            new = index is None
+            if new:
+                index = self.topics[topic] = len(self.topics)
+            self.file.write(RECORD.pack(min(max(delta_us, 0), MAX_DELTA_US), index, len(payload)))
+            if new:
+                name = topic.encode()
+                self.file.write(TOPIC_LENGTH.pack(len(name)) + name)
+            self.file.write(payload)
+            self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def read_recording(path):
+    """Messages as Recorded(offset seconds from the first message, topic, payload)"""
+    with open_file(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not an MQTT recording")
+    messages = []
+    topics = []
+    offset_us = 0
+    pos = len(MAGIC)
+    while pos < len(data):
+        delta_us, index, length = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        if index == len(topics):
+            (name_length,) = TOPIC_LENGTH.unpack_from(data, pos)
+            pos += TOPIC_LENGTH.size
+            topics.append(data[pos:pos + name_length].decode())
+            pos += name_length
+        offset_us += delta_us
+        messages.append(Recorded(offset_us / 1e6, topics[index], data[pos:pos + length]))
+        pos += length
+    return messages
+
+def record(path, broker, port=1883, duration=None, topics=TOPICS):
+    """Record traffic from a live broker until duration elapses or Ctrl-C"""
+    import paho.mqtt.client as mqtt
+
+    def on_connect(client, userdata, flags, rc):
+        for topic in topics:
+            client.subscribe(topic)
+
+    with RecordingWriter(path) as writer:
+        client = mqtt.Client()
+        client.on_connect = on_connect
+        client.on_message = lambda client, userdata, msg: writer.write(msg.topic, msg.payload)
+        client.connect(broker, port, 60)
+        client.loop_start()
+        try:
+            time.sleep(duration) if duration else threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            client.loop_stop()
+    return writer.count
+
+def synthesize(path, devices=25, seconds=60, interval=1.0, anomaly_rate=0.001, seed=0):
+    """Write a recording of simulated sensors and energy meters reporting every interval"""
+    rng = np.random.default_rng(seed)
+    sensors = {"temperature": (22.0, 0.3), "humidity": (45.0, 1.0),
+               "pressure": (1013.0, 0.5), "vibration": (0.2, 0.02)}
+    streams = [(f"sensors/{kind}/device-{i}", kind, mean, std)
+               for kind, (mean, std) in sensors.items() for i in range(devices)]
+    streams += [(f"energy/solar/inverter-{i}", "power", 800.0, 50.0) for i in range(max(1, devices // 5))]
+    streams += [(f"energy/battery/pack-{i}", "soc", 80.0, 0.5) for i in range(max(1, devices // 5))]
+    phases = rng.uniform(0, interval, len(streams))
+    messages = []
+    for tick in range(int(seconds / interval)):
+        values = rng.normal(0, 1, len(streams))
+        spikes = rng.random(len(streams)) < anomaly_rate
+        for i, (topic, field, mean, std) in enumerate(streams):
+            value = mean + std * (values[i] + 8 * spikes[i])
+            messages.append((tick * interval + phases[i], topic, json.dumps({field: round(value, 3)}).encode()))
+    messages.sort()
+    start = time.time()
+    with RecordingWriter(path) as writer:
+        for offset, topic, payload in messages:
+            writer.write(topic, payload, start + offset)
+    return len(messages)
+
+def fan_out(topic, copies):
+    """The topic for each simulated device; copy 0 is the recorded device itself"""
+    prefix, _, device = topic.rpartition("/")
+    return [topic] + [f"{prefix}/{device}~{i}" for i in range(1, copies)]
+
+def schedule(messages, speed=1.0, rate=None, fanout=1):
+    """(seconds after start, topic, payload) for every message to send
+
+    Recorded timing is compressed by speed; a fixed rate spaces messages evenly
+    instead. Each recorded message is sent once per fanned-out device.
+    """
+    topics = {}
+    i = 0
+    for offset, topic, payload in messages:
+        copies = topics.get(topic)
+        if copies is None:
+            copies = topics[topic] = fan_out(topic, fanout)
+        for copy in copies:
+            yield (i / rate if rate else offset / speed), copy, payload
+            i += 1
+
+def percentiles_ms(samples):
+    if not samples:
+        return None
+    values = np.array(samples) * 1000
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary["max"] = round(float(values.max()), 3)
+    return summary
+
+def replay(messages, speed=1.0, rate=None, fanout=1, model=False, timeout=120.0, **collector_args):
+    """Replay messages into an in-process IoTDataCollector and report how it kept up
+
+    Ingest latency runs from when a message was due to be published until the
+    collector's MQTT callback returned; pipeline latency runs until the ML worker
+    finished the batch holding the reading. Both start at the scheduled send time,
+    so a publisher that falls behind shows up as latency instead of hiding it.
+    """
+    import standins
+
+    collector_module = standins.load_collector()
+    if model:
+        ml = standins.load_ml_service("model")
+        standins.FakeClientSession.handler = ml.ml_service.predict_many
+    collector = collector_module.IoTDataCollector(**collector_args)
+    collector.gate.random.seed(0)
+
+    ingest = []
+    pipeline = []
+    on_message = collector.mqtt_client.on_message
+    submit = collector.submit
+    send = collector.send_to_ml_service
+    published_at = {}
+    current = [0.0]
+
+    def timed_on_message(client, userdata, msg):
+        current[0] = msg.published_at
+        on_message(client, userdata, msg)
+        ingest.append(time.perf_counter() - msg.published_at)
+
+    def timed_submit(payload):
+        published_at[id(payload)] = current[0]
+        submit(payload)
+
+    async def timed_send(batch):
+        await send(batch)
+        now = time.perf_counter()
+        for sensor_data in batch:
+            pipeline.append(now - published_at.pop(id(sensor_data)))
+
+    collector.mqtt_client.on_message = timed_on_message
+    collector.submit = timed_submit
+    collector.send_to_ml_service = timed_send
+    thread = standins.start_collector(collector)
+
+    published = unrouted = 0
+    span = max_lag = 0.0
+    start = time.perf_counter()
+    for due, topic, payload in schedule(messages, speed, rate, fanout):
+        target = start + due
+        delay = target - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+        if not standins.broker.publish(topic, payload, target):
+            unrouted += 1
+        published += 1
+        span = due
+    complete = standins.wait_idle(collector, timeout)
+    elapsed = time.perf_counter() - start
+    standins.stop_collector(collector, thread)
+    standins.FakeClientSession.handler = None
+
+    offered = published / span if span else float(published)
+    achieved = published / elapsed if elapsed else 0.0
+    return {
+        "published": published,
+        "offered_per_sec": round(offered, 1),
+        "achieved_per_sec": round(achieved, 1),
+        "seconds": round(elapsed, 3),
+        "max_publish_lag_ms": round(max_lag * 1000, 3),
+        "unrouted": unrouted,
+        "delivered": collector.mqtt_client.delivered,
+        "deadband_suppressed": collector.deadband.received - collector.deadband.stored,
+        "gate_suppressed": collector.gate.counts["suppressed"],
+        "forwarded": collector.enqueued,
+        "dropped": collector.dropped,
+        "processed": len(pipeline),
+        "complete": complete,
+        # Kept up: nothing dropped, everything drained and the offered rate sustained
+        "saturated": bool(collector.dropped or not complete or achieved < 0.95 * offered),
+        "ingest_latency_ms": percentiles_ms(ingest),
+        "pipeline_latency_ms": percentiles_ms(pipeline),
+    }
+
+def print_report(reports):
+    print(f"{'offered/s':>10} {'achieved/s':>10} {'dropped':>8} {'ingest p50':>10} {'p99 ms':>8} "
+          f"{'pipeline p50':>12} {'p99 ms':>8} {'lag ms':>8}  saturated")
+    for report in reports:
+        ingest = report["ingest_latency_ms"] or {"p50": 0, "p99": 0}
+        pipeline = report["pipeline_latency_ms"] or {"p50": 0, "p99": 0}
+        print(f"{report['offered_per_sec']:>10.0f} {report['achieved_per_sec']:>10.0f} {report['dropped']:>8} "
+              f"{ingest['p50']:>10.2f} {ingest['p99']:>8.2f} {pipeline['p50']:>12.2f} {pipeline['p99']:>8.2f} "
+              f"{report['max_publish_lag_ms']:>8.1f}  {'yes' if report['saturated'] else 'no'}")
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description="Record MQTT sensor traffic and replay it into the collector")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record from a live broker")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--broker", default="mqtt-broker")
+    record_parser.add_argument("--port", type=int, default=1883)
+    record_parser.add_argument("--duration", type=float, help="seconds to record (default: until Ctrl-C)")
+
+    synth_parser = commands.add_parser("synth", help="write a simulated recording")
+    synth_parser.add_argument("path")
+    synth_parser.add_argument("--devices", type=int, default=25, help="devices per sensor kind")
+    synth_parser.add_argument("--seconds", type=float, default=60)
+    synth_parser.add_argument("--interval", type=float, default=1.0)
+
+    replay_parser = commands.add_parser("replay", help="replay into an in-process collector")
+    replay_parser.add_argument("path")
+    pacing = replay_parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=float, default=1.0, help="replay at N times recorded speed")
+    pacing.add_argument("--rate", type=float, nargs="+",
+                        help="fixed messages per second; several rates are run in turn to find saturation")
+    replay_parser.add_argument("--fanout", type=int, default=1, help="simulated devices per recorded device")
+    replay_parser.add_argument("--queue-size", type=int)
+    replay_parser.add_argument("--queue-policy", choices=("block", "drop_oldest", "drop_newest"))
+    replay_parser.add_argument("--workers", type=int)
+    replay_parser.add_argument("--model", action="store_true", help="score with a tiny real model")
+    replay_parser.add_argument("--json", action="store_true", help="print full reports as JSON")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        count = record(args.path, args.broker, args.port, args.duration)
+        print(f"Recorded {count} messages to {args.path}")
+    elif args.command == "synth":
+        count = synthesize(args.path, args.devices, args.seconds, args.interval)
+        print(f"Wrote {count} messages to {args.path}")
+    else:
+        messages = read_recording(args.path)
+        collector_args = {name: value for name, value in (("queue_size", args.queue_size),
+                                                           ("queue_policy", args.queue_policy),
+                                                           ("workers", args.workers)) if value is not None}
+        # Keep per-message collector logging (anomaly alerts, errors) out of the report
+        logging.basicConfig(level=logging.ERROR)
+        reports = []
+        for rate in args.rate or [None]:
+            reports.append(replay(messages, args.speed, rate, args.fanout, args.model, **collector_args))
+            if reports[-1]["saturated"] and rate is not None:
+                break
+        if args.json:
+            print(json.dumps(reports, indent=2))
+        else:
+            print_report(reports)
@@ -0,0 +1,87 @@
+# sensor_sampler.py
+import threading
+import time
+from collections import namedtuple
+
+SensorReading = namedtuple("SensorReading", "timestamp voltage current power")
+
+class SensorSampler:
+    """Owns a sensor source and shares its latest reading with every consumer
+
+    A background thread reads the source every interval. Consumers call latest(),
+    which only reads the hardware itself if the cached reading is older than max_age
+    (e.g. the thread is not running).
+    """
+
+    def __init__(self, monitor, interval=5.0, max_age=None):
+        self.monitor = monitor  # SolarMonitor or anything with read_sensors()
+        self.interval = interval
+        self.max_age = 2 * interval if max_age is None else max_age
+        self.lock = threading.Lock()
+        self.reading = None
+        self.reads = 0
+        self.requests = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _read(self):
+        v, c, p = self.monitor.read_sensors()
+        self.reading = SensorReading(time.time(), v, c, p)
+        self.reads += 1
+        return self.reading
+
+    def sample(self):
+        """Read the sensors now"""
+        with self.lock:
+            return self._read()
+
+    def latest(self, max_age=None):
+        max_age = self.max_age if max_age is None else max_age
+        self.requests += 1
+        reading = self.reading
+        if reading is not None and time.time() - reading.timestamp <= max_age:
+            return reading
+        with self.lock:
+            # Another consumer may have refreshed it while we waited for the lock
+            reading = self.reading
+            if reading is None or time.time() - reading.timestamp > max_age:
+                reading = self._read()
+            return reading
+
+    def read_sensors(self):
+        """SolarMonitor-compatible (voltage, current, power) from the cached reading"""
+        return self.latest()[1:]
+
+    def run(self):
+        next_read = time.monotonic()
+        while not self.stop_event.is_set():
+            self.sample()
+            next_read += self.interval
+            self.stop_event.wait(max(0.0, next_read - time.monotonic()))
+
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name="sensor-sampler", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def stats(self):
+        return {"reads": self.reads, "requests": self.requests}
+
+if __name__ == "__main__":
+    from solar_monitor import SolarMonitor
+
+    sampler = SensorSampler(SolarMonitor(), interval=0.5).start()
+    for _ in range(20):
+        for _ in range(100):
+            sampler.latest()
+        time.sleep(0.1)
+    sampler.stop()
+    print(sampler.latest(), sampler.stats())
@@ -0,0 +1,230 @@
+# simulation.py
+import numpy as np
+
+# Vector runs shorter than this hand over to scalar stepping for a burst of steps
+MIN_VECTOR_RUN = 16
+SCALAR_BURST = 64
+MAX_CHUNK = 8192
+
+
+class SimulationResult:
+    def __init__(self, soc_kwh, accepted, rejected, generated_kwh, absorbed_kwh, served_kwh,
+                 demanded_kwh, initial_kwh, step_seconds):
+        self.soc_kwh = soc_kwh              # battery charge after each step
+        self.accepted = accepted            # task ran this step
+        self.rejected = rejected            # task was turned away this step
+        self.generated_kwh = generated_kwh  # solar energy offered to the battery
+        self.absorbed_kwh = absorbed_kwh    # solar energy the battery could take
+        self.served_kwh = served_kwh        # task energy drawn from the battery
+        self.demanded_kwh = demanded_kwh
+        self.initial_kwh = initial_kwh
+        self.step_seconds = step_seconds
+
+    def summary(self):
+        generated = float(self.generated_kwh.sum())
+        absorbed = float(self.absorbed_kwh.sum())
+        served = float(self.served_kwh.sum())
+        demanded = float(self.demanded_kwh.sum())
+        return {
+            "steps": len(self.soc_kwh),
+            "hours": len(self.soc_kwh) * self.step_seconds / 3600,
+            "initial_kwh": self.initial_kwh,
+            "final_kwh": float(self.soc_kwh[-1]) if len(self.soc_kwh) else self.initial_kwh,
+            "min_kwh": float(self.soc_kwh.min()) if len(self.soc_kwh) else self.initial_kwh,
+            "generated_kwh": generated,
+            "absorbed_kwh": absorbed,
+            "curtailed_kwh": generated - absorbed,
+            "demanded_kwh": demanded,
+            "served_kwh": served,
+            "unserved_kwh": demanded - served,
+            "tasks_accepted": int(self.accepted.sum()),
+            "tasks_rejected": int(self.rejected.sum()),
+        }
+
+
+def irradiance_to_power(irradiance_w_m2, panel_w):
+    # Panel ratings are quoted at 1000 W/m2
+    return np.asarray(irradiance_w_m2, dtype=np.float64) / 1000 * panel_w
+
+
+def simulate(irradiance_w_m2, load_kw, step_seconds, panel_w=250, capacity_kwh=10,
+             initial_kwh=None, reserve_kwh=1, task_hours=None, high_priority=None):
+    """Run the main controller loop over an irradiance trace"""
+    return simulate_power(irradiance_to_power(irradiance_w_m2, panel_w), load_kw, step_seconds,
+                          capacity_kwh, initial_kwh, reserve_kwh, task_hours, high_priority)
+
+
+def _inputs(power_w, load_kw, step_seconds, task_hours, high_priority):
+    power_w = np.asarray(power_w, dtype=np.float64)
+    steps = len(power_w)
+    dt_hours = step_seconds / 3600
+    load_kw = np.broadcast_to(np.asarray(load_kw, dtype=np.float64), (steps,))
+    task_hours = np.broadcast_to(np.asarray(dt_hours if task_hours is None else task_hours,
+                                            dtype=np.float64), (steps,))
+    high = np.broadcast_to(np.asarray(False if high_priority is None else high_priority,
+                                      dtype=bool), (steps,))
+    # Same operation order as BatteryManager.charge / discharge so results match bit for bit
+    energy_in = power_w / 1000 * dt_hours
+    needed = load_kw * task_hours
+    has_task = load_kw > 0
+    return energy_in, needed, has_task, high
+
+
+def simulate_power(power_w, load_kw, step_seconds, capacity_kwh=10, initial_kwh=None,
+                   reserve_kwh=1, task_hours=None, high_priority=None):
+    """Vectorized equivalent of stepping SolarMonitor, BatteryManager and LoadBalancer
+
+    Each step charges the battery with the step's solar energy, then schedules a task
+    of load_kw for task_hours (defaulting to the step length). Steps with no load
+    schedule nothing. Long stretches without clipping or a change in task admission are
+    evaluated as one cumulative sum; the steps where the regime changes are stepped
+    individually.
+    """
+    energy_in, needed, has_task, high = _inputs(power_w, load_kw, step_seconds, task_hours, high_priority)
+    steps = len(energy_in)
+    capacity = float(capacity_kwh)
+    state = capacity if initial_kwh is None else float(initial_kwh)
+    initial = state
+
+    soc = np.empty(steps)
+    after_charge = np.empty(steps)
+    accepted = np.zeros(steps, dtype=bool)
+    rejected = np.zeros(steps, dtype=bool)
+    # Normal-priority tasks are refused once the charge is at or below the reserve
+    blocked_low = has_task & ~high
+
+    energy_list = energy_in.tolist()
+    needed_list = needed.tolist()
+    task_list = has_task.tolist()
+    high_list = high.tolist()
+
+    def scalar_step(t, state):
+        charged = state + energy_list[t]
+        if charged > capacity:
+            charged = capacity
+        after_charge[t] = charged
+        ran = False
+        if task_list[t]:
+            if (charged <= reserve_kwh and not high_list[t]) or needed_list[t] > charged:
+                rejected[t] = True
+            else:
+                charged = charged - needed_list[t]
+                accepted[t] = ran = True
+        soc[t] = charged
+        return charged, ran
+
+    t = 0
+    assume_accept = True
+    chunk = MIN_VECTOR_RUN
+    while t < steps:
+        end = min(t + chunk, steps)
+        n = end - t
+        e = energy_in[t:end]
+        if assume_accept:
+            # Interleave charge and discharge so cumsum adds them in the same order as the classes
+            sequence = np.empty(2 * n + 1)
+            sequence[0] = state
+            sequence[1::2] = e
+            sequence[2::2] = np.where(has_task[t:end], -needed[t:end], 0.0)
+            running = np.cumsum(sequence)
+            charged = running[1::2]
+            after = running[2::2]
+            broken = ((charged > capacity)
+                      | (blocked_low[t:end] & (charged <= reserve_kwh))
+                      | (has_task[t:end] & (needed[t:end] > charged)))
+        else:
+            running = np.cumsum(np.concatenate(([state], e)))
+            charged = after = running[1:]
+            admissible = (has_task[t:end] & (needed[t:end] <= charged)
+                          & ((charged > reserve_kwh) | high[t:end]))
+            broken = (charged > capacity) | admissible
+
+        run = int(np.argmax(broken)) if broken.any() else n
+        if run:
+            soc[t:t + run] = after[:run]
+            after_charge[t:t + run] = charged[:run]
+            if assume_accept:
+                accepted[t:t + run] = has_task[t:t + run]
+            else:
+                rejected[t:t + run] = has_task[t:t + run]
+            state = float(after[run - 1])
+        t += run
+        if t >= steps:
+            break
+
+        if run < MIN_VECTOR_RUN:
+            # Busy stretch (clipping or flip-flopping admission); step it in Python
+            ran = True
+            for t in range(t, min(t + SCALAR_BURST, steps)):
+                state, ran = scalar_step(t, state)
+            t += 1
+            chunk = MIN_VECTOR_RUN
+        else:
+            state, ran = scalar_step(t, state)
+            t += 1
+            chunk = min(chunk * 2, MAX_CHUNK) if run == n else MIN_VECTOR_RUN
+        assume_accept = ran or not task_list[t - 1]
+
+    previous = np.concatenate(([initial], soc[:-1]))
+    absorbed = after_charge - previous
+    served = np.where(accepted, needed, 0.0)
+    demanded = np.where(has_task, needed, 0.0)
+    return SimulationResult(soc, accepted, rejected, energy_in, absorbed, served, demanded,
+                            initial, step_seconds)
+
+
+def step_reference(power_w, load_kw, step_seconds, capacity_kwh=10, initial_kwh=None,
+                   task_hours=None, high_priority=None):
+    """Step the real classes over the same trace, for checking simulate_power"""
+    from battery_manager import BatteryManager
+    from event_bus import EventBus
+    from load_balancer import LoadBalancer
+
+    energy_in, needed, has_task, high = _inputs(power_w, load_kw, step_seconds, task_hours, high_priority)
+    dt_hours = step_seconds / 3600
+    load = np.broadcast_to(np.asarray(load_kw, dtype=np.float64), energy_in.shape)
+    hours = np.broadcast_to(np.asarray(dt_hours if task_hours is None else task_hours,
+                                       dtype=np.float64), energy_in.shape)
+    # A private bus with no sinks keeps the reference run quiet even if main subscribed a console
+    events = EventBus()
+    battery = BatteryManager(capacity_kwh, events=events)
+    if initial_kwh is not None:
+        battery.charge_level = initial_kwh
+    load_balancer = LoadBalancer(battery, events=events)
+
+    soc = np.empty(len(energy_in))
+    accepted = np.zeros(len(energy_in), dtype=bool)
+    for t, power in enumerate(np.asarray(power_w, dtype=np.float64).tolist()):
+        battery.charge(power / 1000 * dt_hours)
+        if has_task[t]:
+            priority = 'high' if high[t] else 'normal'
+            accepted[t] = load_balancer.schedule_task(float(load[t]), float(hours[t]), priority)
+        soc[t] = battery.charge_level
+    return soc, accepted
+
+
+def daylight_profile(step_seconds, peak_w_m2=1000):
+    """One day of half-sine irradiance between 06:00 and 18:00"""
+    steps_per_day = int(round(86400 / step_seconds))
+    hour = (np.arange(steps_per_day) * step_seconds / 3600) % 24
+    return peak_w_m2 * np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+
+
+def synthetic_day_trace(days, step_seconds, peak_w_m2=1000, seed=None):
+    """Half-sine daylight irradiance with random day-to-day cloud cover"""
+    rng = np.random.default_rng(seed)
+    cloud = rng.uniform(0.3, 1.0, size=(days, 1))
+    return (daylight_profile(step_seconds, peak_w_m2) * cloud).ravel()
+
+
+if __name__ == "__main__":
+    import time
+
+    step_seconds = 60
+    irradiance = synthetic_day_trace(365, step_seconds, seed=1)
+    start = time.perf_counter()
+    result = simulate(irradiance, 0.3, step_seconds, panel_w=800, capacity_kwh=10)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {result.summary()['hours'] / 24:.0f} days at 1-minute resolution in {elapsed:.3f} s")
+    for key, value in result.summary().items():
+        print(f"  {key}: {value}")
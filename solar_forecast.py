@@ -0,0 +1,120 @@
+# solar_forecast.py
+import bisect
+import math
+import time
+from collections import OrderedDict
+
+DAY = 86400
+
+def clear_sky_irradiance(timestamp, latitude, longitude):
+    """Global horizontal clear-sky irradiance (W/m2) from NOAA solar geometry and the Haurwitz model"""
+    day_of_year = time.gmtime(timestamp).tm_yday
+    hour = (timestamp % DAY) / 3600
+    gamma = 2 * math.pi / 365 * (day_of_year - 1 + (hour - 12) / 24)
+    equation_of_time = 229.18 * (0.000075 + 0.001868 * math.cos(gamma) - 0.032077 * math.sin(gamma)
+                                 - 0.014615 * math.cos(2 * gamma) - 0.040849 * math.sin(2 * gamma))
+    declination = (0.006918 - 0.399912 * math.cos(gamma) + 0.070257 * math.sin(gamma)
+                   - 0.006758 * math.cos(2 * gamma) + 0.000907 * math.sin(2 * gamma)
+                   - 0.002697 * math.cos(3 * gamma) + 0.00148 * math.sin(3 * gamma))
+    solar_minutes = hour * 60 + equation_of_time + 4 * longitude
+    hour_angle = math.radians(solar_minutes / 4 - 180)
+    lat = math.radians(latitude)
+    cos_zenith = (math.sin(lat) * math.sin(declination)
+                  + math.cos(lat) * math.cos(declination) * math.cos(hour_angle))
+    if cos_zenith <= 0:
+        return 0.0
+    return 1098 * cos_zenith * math.exp(-0.057 / cos_zenith)
+
+class SolarForecast:
+    def __init__(self, latitude, longitude, panel_w=250, base_load_w=0.0, step_seconds=300,
+                 smoothing=0.2, cache_days=3):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.panel_w = panel_w
+        self.base_load_w = base_load_w  # site draw that solar has to cover before there is surplus
+        self.step_seconds = step_seconds
+        self.smoothing = smoothing
+        self.cache_days = cache_days
+        self.clearness = 1.0  # observed / clear-sky power, smoothed
+        self.curves = OrderedDict()   # UTC day -> clear-sky irradiance per step
+        self.windows = OrderedDict()  # (UTC day, clearness) -> surplus windows
+
+    def _cached(self, cache, key, build, limit):
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build()
+            if len(cache) > limit:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return value
+
+    def curve(self, day):
+        """Clear-sky irradiance for every step of a UTC day, computed once per day"""
+        start = day * DAY
+        return self._cached(self.curves, day, lambda: [
+            clear_sky_irradiance(start + offset, self.latitude, self.longitude)
+            for offset in range(0, DAY, self.step_seconds)
+        ], self.cache_days)
+
+    def clear_sky_power(self, timestamp):
+        day, offset = divmod(timestamp, DAY)
+        return self.panel_w * self.curve(int(day))[int(offset // self.step_seconds)] / 1000
+
+    def predicted_power(self, timestamp):
+        return self.clear_sky_power(timestamp) * self.clearness
+
+    def observe(self, power_w, timestamp=None):
+        """Correct the forecast with a SolarMonitor reading"""
+        timestamp = time.time() if timestamp is None else timestamp
+        expected = self.clear_sky_power(timestamp)
+        # Readings near sunrise and sunset say little about cloud cover
+        if expected < 0.05 * self.panel_w:
+            return
+        ratio = min(power_w / expected, 1.5)
+        self.clearness += self.smoothing * (ratio - self.clearness)
+
+    def surplus_windows(self, day):
+        """(start, end) spans of a UTC day where predicted power exceeds the base load"""
+        clearness = round(self.clearness, 2)
+
+        def build():
+            spans = []
+            start = None
+            for step, irradiance in enumerate(self.curve(day)):
+                surplus = self.panel_w * irradiance / 1000 * clearness > self.base_load_w
+                at = day * DAY + step * self.step_seconds
+                if surplus and start is None:
+                    start = at
+                elif not surplus and start is not None:
+                    spans.append((start, at))
+                    start = None
+            if start is not None:
+                spans.append((start, (day + 1) * DAY))
+            return spans
+
+        return self._cached(self.windows, (day, clearness), build, 4 * self.cache_days)
+
+    def in_surplus(self, timestamp):
+        spans = self.surplus_windows(int(timestamp // DAY))
+        i = bisect.bisect_right(spans, (timestamp, math.inf)) - 1
+        return i >= 0 and spans[i][0] <= timestamp < spans[i][1]
+
+    def next_surplus(self, timestamp, until=math.inf):
+        """Start of the first surplus window at or after timestamp and before until, or None"""
+        day = int(timestamp // DAY)
+        for candidate in (day, day + 1):
+            if candidate * DAY >= until:
+                break
+            for start, end in self.surplus_windows(candidate):
+                if end > timestamp:
+                    start = max(start, timestamp)
+                    return start if start < until else None
+        return None
+
+if __name__ == "__main__":
+    forecast = SolarForecast(latitude=37.77, longitude=-122.42, panel_w=800, base_load_w=200)
+    now = time.time()
+    print(f"Clear-sky power now: {forecast.clear_sky_power(now):.0f} W")
+    for start, end in forecast.surplus_windows(int(now // DAY)):
+        print(f"Surplus {time.strftime('%H:%M', time.gmtime(start))}-{time.strftime('%H:%M', time.gmtime(end))} UTC")
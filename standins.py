@@ -0,0 +1,493 @@
+# standins.py
+"""In-process stand-ins for the services the edge apps talk to
+
+Lets the embedded scripts in ml-inference-service.py run on a laptop with no TFLite
+runtime, MQTT broker, Redis, ML endpoint or Raspberry Pi GPIO. The stand-ins only
+implement the calls those scripts make. install_aliases() makes Energy.py, module.py
+and main_controller importable under the names the rest of the tree uses.
+"""
+import asyncio
+import ctypes
+import fcntl
+import importlib.util
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import types
+from importlib.machinery import SourceFileLoader
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+EMBEDDED = os.path.join(ROOT, "ml-inference-service.py")
+ML_SERVICE = "# edge-apps/ml-inference-service.py"
+COLLECTOR = "# iot-pipeline/data-collector.py"
+ENERGY_MONITOR = "# energy-monitoring/solar-monitor.py"
+TENSOR_HEADER = struct.Struct('<II')
+
+# Modules whose file name differs from the name the rest of the tree imports them by
+ALIASES = {"battery_manager": "Energy.py", "solar_monitor": "module.py", "main": "main_controller"}
+
+def install_aliases():
+    """Make the aliased modules importable by name, for scripts run from a checkout"""
+    for name, filename in ALIASES.items():
+        if name not in sys.modules:
+            loader = SourceFileLoader(name, os.path.join(ROOT, filename))
+            module = importlib.util.module_from_spec(importlib.util.spec_from_loader(name, loader))
+            sys.modules[name] = module
+            try:
+                loader.exec_module(module)
+            except BaseException:
+                del sys.modules[name]
+                raise
+
+def load_section(header, name):
+    """Execute one embedded script as a module, once per process"""
+    if name in sys.modules:
+        return sys.modules[name]
+    with open(EMBEDDED) as f:
+        text = f.read()
+    start = text.index(header)
+    end = text.find("\n#=====", start)
+    module = types.ModuleType(name)
+    module.__file__ = EMBEDDED
+    sys.modules[name] = module
+    try:
+        exec(compile(text[start:end if end != -1 else None], f"{EMBEDDED}:{name}", "exec"), module.__dict__)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+def install(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+# --- TensorFlow Lite ----------------------------------------------------------
+
+class StubInterpreter:
+    """tflite Interpreter API that returns a constant score; measures everything but the model"""
+
+    def __init__(self, model_path=None, num_threads=None):
+        self.shape = [1, 16]
+        self.output = None
+
+    def allocate_tensors(self):
+        self.output = np.full((self.shape[0], 1), 0.25, dtype=np.float32)
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.shape), "dtype": np.float32}]
+
+    def get_output_details(self):
+        return [{"index": 1, "shape": np.array([self.shape[0], 1]), "dtype": np.float32}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = list(shape)
+
+    def set_tensor(self, index, value):
+        if list(value.shape) != self.shape:
+            raise ValueError(f"Input shape {value.shape} does not match tensor {self.shape}")
+        self.input = value
+
+    def invoke(self):
+        pass
+
+    def get_tensor(self, index):
+        return self.output
+
+class NumpyInterpreter(StubInterpreter):
+    """A tiny real model behind the tflite API: one hidden layer and a sigmoid output
+
+    Weights are seeded by input width. Output weights are positive and biased so that
+    only the most unusual ~0.1% of normalized windows score above 0.5.
+    """
+
+    HIDDEN = 16
+    BIAS = -3.0
+
+    def __init__(self, model_path=None, num_threads=None):
+        super().__init__(model_path, num_threads)
+        self.weights = {}
+
+    def layers(self, width):
+        if width not in self.weights:
+            rng = np.random.default_rng(width)
+            self.weights[width] = (rng.normal(0, 1 / np.sqrt(width), (width, self.HIDDEN)).astype(np.float32),
+                                   np.abs(rng.normal(0, 1 / np.sqrt(self.HIDDEN), (self.HIDDEN, 1))).astype(np.float32))
+        return self.weights[width]
+
+    def invoke(self):
+        hidden_weights, output_weights = self.layers(self.input.shape[1])
+        hidden = np.maximum(self.input @ hidden_weights, 0)
+        self.output = 1 / (1 + np.exp(-(hidden @ output_weights + self.BIAS)))
+
+INTERPRETERS = {"stub": StubInterpreter, "model": NumpyInterpreter}
+
+def install_tflite(interpreter="stub"):
+    install("tflite_runtime")
+    return install("tflite_runtime.interpreter", Interpreter=INTERPRETERS[interpreter])
+
+def use_interpreter(service_module, interpreter):
+    """Swap the interpreter class and reload the service's pool"""
+    sys.modules["tflite_runtime.interpreter"].Interpreter = INTERPRETERS[interpreter]
+    service_module.ml_service.load_model()
+
+# --- Redis --------------------------------------------------------------------
+
+class FakeRedis:
+    def __init__(self, *args, **kwargs):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.lists = {}
+        self.commands = 0
+        self.round_trips = 0
+
+    def _setex(self, key, ttl, value):
+        self.values[key] = (time.time() + ttl, value)
+
+    def _lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def setex(self, key, ttl, value):
+        with self.lock:
+            self._setex(key, ttl, value)
+            self.commands += 1
+            self.round_trips += 1
+
+    def lpush(self, key, value):
+        with self.lock:
+            self._lpush(key, value)
+            self.commands += 1
+            self.round_trips += 1
+
+    def get(self, key):
+        with self.lock:
+            expires, value = self.values.get(key, (0, None))
+            return value if expires > time.time() else None
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((FakeRedis._setex, (key, ttl, value)))
+        return self
+
+    def lpush(self, key, value):
+        self.commands.append((FakeRedis._lpush, (key, value)))
+        return self
+
+    def execute(self):
+        with self.redis.lock:
+            for command, args in self.commands:
+                command(self.redis, *args)
+            self.redis.commands += len(self.commands)
+            self.redis.round_trips += 1
+        self.commands = []
+
+# --- MQTT ---------------------------------------------------------------------
+
+def topic_matches(pattern, topic):
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+    for i, part in enumerate(pattern_parts):
+        if part == "#":
+            return True
+        if i >= len(topic_parts) or (part != "+" and part != topic_parts[i]):
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+class MQTTMessage:
+    __slots__ = ("topic", "payload", "published_at")
+
+    def __init__(self, topic, payload, published_at):
+        self.topic = topic
+        self.payload = payload
+        self.published_at = published_at  # perf_counter() at publish, for latency measurements
+
+class InProcessBroker:
+    """Routes published messages to subscribed FakeMQTTClients on their network threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = []
+
+    def publish(self, topic, payload, published_at=None):
+        """Queue a message for every matching subscriber; returns how many it reached
+
+        Load generators pass the time the message was due, so latency includes any
+        time it spent waiting to be sent.
+        """
+        if published_at is None:
+            published_at = time.perf_counter()
+        message = MQTTMessage(topic, payload, published_at)
+        delivered = 0
+        for client in self.clients:
+            if any(topic_matches(pattern, topic) for pattern in client.subscriptions):
+                client.inbox.put(message)
+                delivered += 1
+        return delivered
+
+    def attach(self, client):
+        with self.lock:
+            self.clients = self.clients + [client]
+
+    def detach(self, client):
+        with self.lock:
+            self.clients = [c for c in self.clients if c is not client]
+
+broker = InProcessBroker()
+
+class FakeMQTTClient:
+    """paho.mqtt.client.Client stand-in bound to the in-process broker"""
+
+    def __init__(self, *args, **kwargs):
+        self.on_connect = None
+        self.on_message = None
+        self.subscriptions = []
+        self.inbox = queue.Queue()
+        self.thread = None
+        self.connected = threading.Event()
+        self.delivered = 0
+
+    def connect(self, host, port=1883, keepalive=60):
+        broker.attach(self)
+        return 0
+
+    def disconnect(self):
+        broker.detach(self)
+        return 0
+
+    def subscribe(self, topic, qos=0):
+        self.subscriptions.append(topic)
+        return 0, len(self.subscriptions)
+
+    def loop_start(self):
+        self.thread = threading.Thread(target=self._loop, name="fake-mqtt", daemon=True)
+        self.thread.start()
+
+    def loop_stop(self):
+        if self.thread is not None:
+            self.inbox.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _loop(self):
+        if self.on_connect is not None:
+            self.on_connect(self, None, {}, 0)
+        self.connected.set()
+        while True:
+            message = self.inbox.get()
+            if message is None:
+                break
+            self.on_message(self, None, message)
+            self.delivered += 1
+            self.inbox.task_done()
+
+    def drain(self, timeout=60.0):
+        """Wait until every queued message has been handed to on_message"""
+        deadline = time.monotonic() + timeout
+        while self.inbox.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+# --- Raspberry Pi ---------------------------------------------------------------
+
+class FakeGPIO:
+    BCM = "BCM"
+    IN = "IN"
+    pins = {}
+
+    @staticmethod
+    def setmode(mode):
+        pass
+
+    @staticmethod
+    def setup(pin, direction):
+        FakeGPIO.pins[pin] = direction
+
+    @staticmethod
+    def cleanup():
+        FakeGPIO.pins.clear()
+
+class FakeSpiDev:
+    """spidev.SpiDev stand-in with a simulated MCP3008 on the bus
+
+    Transfers arrive through spi_ioctl() (patched over fcntl.ioctl) as SPI_IOC_MESSAGE
+    segments. Each chip-select cycle that carries a conversion request is answered with
+    a random count, and the counts are kept per channel so callers can check decoding.
+    """
+
+    devices = {}
+
+    def __init__(self, seed=0):
+        self.max_speed_hz = 0
+        self.rng = np.random.default_rng(seed)
+        self.messages = 0
+        self.cs_cycles = 0
+        self.counts = {}
+
+    def open(self, bus, device):
+        self.fd = 1000 + len(FakeSpiDev.devices)
+        FakeSpiDev.devices[self.fd] = self
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        FakeSpiDev.devices.pop(self.fd, None)
+
+    def convert(self, request):
+        """Reply to one chip-select cycle"""
+        self.cs_cycles += 1
+        if len(request) < 3 or request[0] != 1 or not request[1] & 0x80:
+            return bytes(len(request))
+        channel = (request[1] >> 4) & 7
+        count = int(self.rng.integers(0, 1024))
+        self.counts.setdefault(channel, []).append(count)
+        return bytes([0, count >> 8, count & 0xff]) + bytes(len(request) - 3)
+
+    def transfer(self, segments):
+        self.messages += 1
+        tx_frame = []
+        for segment in segments:
+            tx_frame.append((segment, ctypes.string_at(segment.tx_buf, segment.len)))
+            # Chip select stays low across segments until one releases it
+            if segment.cs_change or segment is segments[-1]:
+                frame = self.convert(b"".join(tx for _, tx in tx_frame))
+                for segment, tx in tx_frame:
+                    ctypes.memmove(segment.rx_buf, frame[:len(tx)], len(tx))
+                    frame = frame[len(tx):]
+                tx_frame = []
+
+real_ioctl = fcntl.ioctl
+
+def spi_ioctl(fd, request, arg=0, mutate_flag=True):
+    device = FakeSpiDev.devices.get(fd)
+    if device is None:
+        return real_ioctl(fd, request, arg, mutate_flag)
+    device.transfer(list(arg))
+    return 0
+
+def install_energy_standins():
+    install("requests")
+    install("spidev", SpiDev=FakeSpiDev)
+    install("RPi")
+    install("RPi.GPIO", **{name: getattr(FakeGPIO, name) for name in ("BCM", "IN", "setmode", "setup", "cleanup")})
+
+# --- aiohttp ------------------------------------------------------------------
+
+def constant_scores(rows):
+    return [{"anomaly_score": 0.25, "is_anomaly": False, "confidence": 0.5} for _ in range(rows)]
+
+class FakeResponse:
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.payload
+
+class FakeClientSession:
+    """aiohttp.ClientSession stand-in that answers /predict_batch in process
+
+    The handler maps a decoded (rows, cols) tensor or JSON rows to a result list;
+    by default every reading scores as normal.
+    """
+
+    handler = None
+    requests = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def post(self, url, data=None, json=None, headers=None):
+        FakeClientSession.requests += 1
+        if data is not None:
+            rows, cols = TENSOR_HEADER.unpack_from(data)
+            sensor_data = np.frombuffer(data, dtype='<f4', offset=TENSOR_HEADER.size).reshape(rows, cols)
+        else:
+            sensor_data = json["sensor_data"]
+        handler = FakeClientSession.handler
+        results = handler(sensor_data) if handler else constant_scores(len(sensor_data))
+        return FakeResponse({"results": results})
+
+def install_collector_standins():
+    install("paho")
+    install("paho.mqtt")
+    install("paho.mqtt.client", Client=FakeMQTTClient)
+    install("redis", Redis=FakeRedis)
+    install("aiohttp", ClientSession=FakeClientSession,
+            TCPConnector=lambda **kwargs: None, ClientTimeout=lambda **kwargs: None)
+
+def _serve(collector):
+    try:
+        asyncio.run(collector.serve())
+    except asyncio.CancelledError:
+        pass
+
+def start_collector(collector):
+    """Run a collector's event loop on a background thread, without its metrics server
+
+    Returns once the collector is subscribed and serving.
+    """
+    thread = threading.Thread(target=_serve, args=(collector,), name="collector", daemon=True)
+    thread.start()
+    collector.mqtt_client.connected.wait()
+    return thread
+
+def stop_collector(collector, thread):
+    collector.mqtt_client.disconnect()
+    collector.loop.call_soon_threadsafe(lambda: [task.cancel() for task in asyncio.all_tasks()])
+    thread.join()
+
+def wait_idle(collector, timeout=60.0):
+    """Wait until the MQTT thread and the collector's workers have nothing left to do"""
+    deadline = time.monotonic() + timeout
+    if not collector.mqtt_client.drain(timeout):
+        return False
+    future = asyncio.run_coroutine_threadsafe(collector.queue.join(), collector.loop)
+    try:
+        future.result(max(0.0, deadline - time.monotonic()))
+    except Exception:
+        return False
+    collector.redis_writer.flush()
+    return True
+
+def load_ml_service(interpreter="stub"):
+    install_tflite(interpreter)
+    return load_section(ML_SERVICE, "ml_inference_service")
+
+def load_collector():
+    install_collector_standins()
+    return load_section(COLLECTOR, "data_collector")
+
+def load_energy_monitor():
+    install_energy_standins()
+    return load_section(ENERGY_MONITOR, "energy_monitor")
@@ -0,0 +1,225 @@
+# telemetry_store.py
+import math
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Fixed-width records, appended in timestamp order
+SAMPLE_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('voltage', '<f4'),
+    ('current', '<f4'),
+    ('power', '<f4'),
+    ('soc', '<f4'),
+])
+ROLLUP_DTYPE = np.dtype([
+    ('timestamp', '<f8'),   # bucket start
+    ('count', '<u4'),
+    ('power_mean', '<f4'),
+    ('power_min', '<f4'),
+    ('power_max', '<f4'),
+    ('voltage_mean', '<f4'),
+    ('current_mean', '<f4'),
+    ('soc_last', '<f4'),
+])
+SAMPLE_STRUCT = struct.Struct('<dffff')
+ROLLUP_STRUCT = struct.Struct('<dIffffff')
+
+# tier -> (bucket seconds, segment file name format); each rollup tier folds the one before it
+TIERS = {
+    'raw': (None, '%Y%m%d'),
+    '1m': (60, '%Y%m%d'),
+    '1h': (3600, '%Y%m'),
+    '1d': (86400, '%Y'),
+}
+ROLLUP_TIERS = ['1m', '1h', '1d']
+
+
+class Rollup:
+    def __init__(self, bucket_start):
+        self.bucket_start = bucket_start
+        self.count = 0
+        self.power_sum = 0.0
+        self.power_min = math.inf
+        self.power_max = -math.inf
+        self.voltage_sum = 0.0
+        self.current_sum = 0.0
+        self.soc_last = math.nan
+
+    def add(self, count, power_mean, power_min, power_max, voltage_mean, current_mean, soc_last):
+        self.count += count
+        self.power_sum += power_mean * count
+        self.power_min = min(self.power_min, power_min)
+        self.power_max = max(self.power_max, power_max)
+        self.voltage_sum += voltage_mean * count
+        self.current_sum += current_mean * count
+        if not math.isnan(soc_last):
+            self.soc_last = soc_last
+
+    def record(self):
+        return (self.bucket_start, self.count,
+                self.power_sum / self.count, self.power_min, self.power_max,
+                self.voltage_sum / self.count, self.current_sum / self.count,
+                self.soc_last)
+
+
+class TelemetryStore:
+    def __init__(self, root):
+        self.root = root
+        for tier in TIERS:
+            os.makedirs(os.path.join(root, tier), exist_ok=True)
+        self.files = {}      # tier -> (segment name, open append handle)
+        self.rollups = {}    # tier -> Rollup for the bucket being filled
+        self.out_of_order = 0
+        # Guards the open handles, so flush() can run on another thread than append()
+        self.lock = threading.Lock()
+        last = self._last_record('raw')
+        self.last_timestamp = -math.inf if last is None else float(last['timestamp'])
+        self._restore_rollups()
+
+    def _segment_path(self, tier, segment):
+        return os.path.join(self.root, tier, segment + '.bin')
+
+    def _segment_name(self, tier, timestamp):
+        return time.strftime(TIERS[tier][1], time.gmtime(timestamp))
+
+    def _segment_names(self, tier):
+        names = [name[:-4] for name in os.listdir(os.path.join(self.root, tier)) if name.endswith('.bin')]
+        return sorted(names)
+
+    def _last_record(self, tier):
+        for segment in reversed(self._segment_names(tier)):
+            records = self._open_segment(tier, segment)
+            if len(records):
+                return records[-1]
+        return None
+
+    def _records_since(self, tier, start):
+        """Memory-mapped views of every record with timestamp >= start, one per segment"""
+        first = self._segment_name(tier, start) if math.isfinite(start) else ''
+        for segment in self._segment_names(tier):
+            if segment < first:
+                continue
+            records = self._open_segment(tier, segment)
+            lo = np.searchsorted(records['timestamp'], start, 'left')
+            if lo < len(records):
+                yield records[lo:]
+
+    def _restore_rollups(self):
+        # Rebuild the buckets being filled, coarsest first, from the finer rows stored after
+        # each tier's last closed bucket; buckets missed by an earlier run are written out
+        sources = ['raw'] + ROLLUP_TIERS[:-1]
+        for level in reversed(range(len(ROLLUP_TIERS))):
+            tier = ROLLUP_TIERS[level]
+            last = self._last_record(tier)
+            since = -math.inf if last is None else float(last['timestamp']) + TIERS[tier][0]
+            for records in self._records_since(sources[level], since):
+                for record in records.tolist():
+                    if level == 0:
+                        timestamp, voltage, current, power, soc = record
+                        self._fold(0, timestamp, (1, power, power, power, voltage, current, soc))
+                    else:
+                        self._fold(level, record[0], record[1:])
+
+    def _write(self, tier, timestamp, packed):
+        segment = self._segment_name(tier, timestamp)
+        current = self.files.get(tier)
+        if current is None or current[0] != segment:
+            if current is not None:
+                current[1].close()
+            current = (segment, open(self._segment_path(tier, segment), 'ab'))
+            self.files[tier] = current
+        current[1].write(packed)
+
+    def append(self, timestamp, voltage, current, power, soc=math.nan):
+        """Store a sample; returns False if it is older than the last one and was dropped"""
+        if timestamp < self.last_timestamp:
+            # The clock stepped back (e.g. an NTP correction); segments must stay in order
+            self.out_of_order += 1
+            return False
+        self.last_timestamp = timestamp
+        with self.lock:
+            self._write('raw', timestamp, SAMPLE_STRUCT.pack(timestamp, voltage, current, power, soc))
+            self._fold(0, timestamp, (1, power, power, power, voltage, current, soc))
+        return True
+
+    def _fold(self, level, timestamp, values):
+        # Close finished buckets and cascade them into the next, coarser tier
+        tier = ROLLUP_TIERS[level]
+        seconds = TIERS[tier][0]
+        bucket_start = timestamp - timestamp % seconds
+        rollup = self.rollups.get(tier)
+        if rollup is not None and rollup.bucket_start != bucket_start:
+            record = rollup.record()
+            self._write(tier, rollup.bucket_start, ROLLUP_STRUCT.pack(*record))
+            if level + 1 < len(ROLLUP_TIERS):
+                self._fold(level + 1, rollup.bucket_start, record[1:])
+            rollup = None
+        if rollup is None:
+            rollup = self.rollups[tier] = Rollup(bucket_start)
+        rollup.add(*values)
+
+    def flush(self):
+        with self.lock:
+            for _, handle in self.files.values():
+                handle.flush()
+
+    def close(self):
+        # Buckets still being filled are not written; they would be partial. Reopening the
+        # store rebuilds them from the rows already on disk.
+        with self.lock:
+            for _, handle in self.files.values():
+                handle.close()
+            self.files = {}
+
+    def _open_segment(self, tier, segment):
+        dtype = SAMPLE_DTYPE if tier == 'raw' else ROLLUP_DTYPE
+        path = self._segment_path(tier, segment)
+        # Ignore a trailing partial record left by an interrupted write
+        count = os.path.getsize(path) // dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+    def segments(self, start, end, tier='raw'):
+        """Yield memory-mapped views of records with start <= timestamp < end, one per segment"""
+        self.flush()
+        first = self._segment_name(tier, start)
+        last = self._segment_name(tier, end)
+        for segment in self._segment_names(tier):
+            if segment < first or segment > last:
+                continue
+            records = self._open_segment(tier, segment)
+            timestamps = records['timestamp']
+            lo = np.searchsorted(timestamps, start, 'left')
+            hi = np.searchsorted(timestamps, end, 'left')
+            if hi > lo:
+                yield records[lo:hi]
+
+    def query(self, start, end, tier='raw'):
+        """Records in [start, end); a view when the range fits one segment, else a copy"""
+        views = list(self.segments(start, end, tier))
+        if not views:
+            return np.empty(0, dtype=SAMPLE_DTYPE if tier == 'raw' else ROLLUP_DTYPE)
+        if len(views) == 1:
+            return views[0]
+        return np.concatenate(views)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from solar_monitor import SolarMonitor
+
+    monitor = SolarMonitor()
+    store = TelemetryStore(tempfile.mkdtemp())
+    start = time.time()
+    for second in range(3 * 3600):
+        v, c, p = monitor.read_sensors()
+        store.append(start + second, v, c, p)
+    print(f"Stored {len(store.query(start, start + 3 * 3600))} samples")
+    print(f"1m rollups: {len(store.query(start, start + 3 * 3600, '1m'))}")
+    print(f"1h rollups: {len(store.query(start, start + 3 * 3600, '1h'))}")
+    store.close()
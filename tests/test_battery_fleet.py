@@ -0,0 +1,63 @@
+import numpy as np
+
+from battery_fleet import BatteryFleet
+from battery_manager import BatteryManager
+from event_bus import EventBus
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event):
+        # Timestamps differ between the two runs; everything else must not
+        self.events.append((type(event).__name__,) + tuple(event)[1:])
+
+    def flush(self):
+        pass
+
+def test_fleet_steps_match_battery_manager_exactly():
+    rng = np.random.default_rng(0)
+    capacity = rng.uniform(5, 15, 50)
+    fleet = BatteryFleet(capacity, charge_level=capacity / 2)
+    managers = [BatteryManager(c) for c in capacity.tolist()]
+    for manager, level in zip(managers, (capacity / 2).tolist()):
+        manager.charge_level = level
+    filled = refused = 0
+    for _ in range(500):
+        # Big enough swings that batteries hit both full and empty
+        solar = rng.uniform(0, 2, len(fleet))
+        load = rng.uniform(0, 6, len(fleet))
+        fleet.charge(solar)
+        filled += int((fleet.charge_level == fleet.capacity_kwh).sum())
+        ok = fleet.discharge(load, 0.5)
+        refused += int((~ok).sum())
+        for manager, energy in zip(managers, solar.tolist()):
+            manager.charge(energy)
+        expected = [manager.discharge(kw, 0.5) for manager, kw in zip(managers, load.tolist())]
+        assert ok.tolist() == expected
+        assert fleet.charge_level.tolist() == [manager.charge_level for manager in managers]
+    assert filled and refused
+
+def test_views_publish_the_same_events_as_battery_manager():
+    fleet_bus, manager_bus = EventBus(), EventBus()
+    fleet_events = fleet_bus.subscribe(Recorder())
+    manager_events = manager_bus.subscribe(Recorder())
+    view = BatteryFleet(10, count=3, events=fleet_bus)[1]
+    manager = BatteryManager(10, events=manager_bus)
+    for battery in (view, manager):
+        assert battery.discharge(2, 1)
+        battery.charge(5)
+        assert not battery.discharge(11, 1)
+        battery.charge(0.5)
+    fleet_bus.flush()
+    manager_bus.flush()
+    assert fleet_events.events == manager_events.events
+    assert view.charge_level == manager.charge_level
+
+def test_power_limits_cap_charging_and_refuse_heavy_loads():
+    fleet = BatteryFleet([10, 10], charge_level=[2, 2], max_charge_kw=[1, np.inf], max_discharge_kw=[3, np.inf])
+    assert fleet.charge([4, 4], duration_hours=2).tolist() == [2, 4]
+    assert fleet.discharge([4, 4], 0.5).tolist() == [False, True]
+    assert fleet.charge_level.tolist() == [4, 4]
+    assert not fleet[0].discharge(4, 0.5)
+    assert fleet[1].discharge(4, 0.5)
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import time
+
+from control_loop import ControlLoop
+
+def run(control, duration):
+    asyncio.run(control.run(duration=duration))
+
+def test_ticks_follow_the_start_time_without_drift():
+    control = ControlLoop()
+    ticks = []
+
+    def work():
+        ticks.append(time.monotonic())
+        time.sleep(0.005)
+
+    task = control.every(0.02, work)
+    run(control, 0.5)
+    # Each run's own time is not added to the period: 25 ticks fit in 0.5 s, where
+    # sleeping a period after each 5 ms run would only fit 20
+    assert 23 <= task.runs + task.missed <= 28
+    # and they stay on the 20 ms grid, apart from the odd one the machine delays
+    offsets = sorted(min(r, 0.02 - r) for r in ((tick - ticks[0]) % 0.02 for tick in ticks))
+    assert offsets[len(offsets) // 2] < 0.004
+
+def test_overruns_and_missed_ticks_are_counted():
+    control = ControlLoop()
+    task = control.every(0.02, lambda: time.sleep(0.05), name="slow", deadline=0.03)
+    run(control, 0.5)
+    assert task.overruns == task.runs
+    # A 50 ms run spans two more 20 ms ticks, which are skipped rather than run late
+    assert task.missed >= 2 * (task.runs - 1)
+    assert 0.4 / 0.02 <= task.runs + task.missed <= 0.6 / 0.02
+    stats = control.stats()["slow"]
+    assert stats["max"] >= 0.05
+    assert stats["buckets"]["0.05"] + stats["buckets"]["0.1"] == task.runs
+
+def test_failing_task_is_logged_and_keeps_running(caplog):
+    control = ControlLoop()
+
+    def broken():
+        raise RuntimeError("sensor unplugged")
+
+    task = control.every(0.02, broken)
+    with caplog.at_level(logging.ERROR, logger="control_loop"):
+        run(control, 0.1)
+    assert task.errors == task.runs >= 4
+    assert "Control task broken failed" in caplog.text
+    assert "sensor unplugged" in caplog.text
+
+def test_blocking_task_in_a_thread_does_not_hold_up_the_others():
+    def missed(in_thread):
+        control = ControlLoop()
+        fast = control.every(0.01, lambda: None, name="fast")
+        control.every(0.1, lambda: time.sleep(0.08), name="blocking", in_thread=in_thread)
+        run(control, 0.5)
+        return fast.missed
+
+    assert missed(in_thread=False) >= 20
+    assert missed(in_thread=True) < 10
@@ -0,0 +1,68 @@
+import threading
+
+from dashboard_server import SnapshotHub
+
+class FlakyDashboard:
+    def __init__(self):
+        self.calls = 0
+
+    def snapshot(self):
+        self.calls += 1
+        if self.calls == 2:
+            raise OSError("sensor read failed")
+        return {"solar_power_w": self.calls}
+
+def test_hub_keeps_running_after_a_failed_snapshot():
+    dashboard = FlakyDashboard()
+    hub = SnapshotHub(dashboard, interval=0.01)
+    client = hub.connect()
+    stop = threading.Event()
+    thread = threading.Thread(target=hub.run, args=(stop,), daemon=True)
+    thread.start()
+    while dashboard.calls < 4:
+        stop.wait(0.01)
+    stop.set()
+    thread.join()
+    assert hub.errors == 1
+    assert hub.ticks >= 3
+    messages = []
+    while not client.empty():
+        messages.append(client.get_nowait())
+    assert any(b'"solar_power_w": 3' in message for message in messages)
+
+def test_tick_sends_only_changed_fields():
+    class Fixed:
+        value = 1
+
+        def snapshot(self):
+            return {"a": 1, "b": self.value}
+
+    dashboard = Fixed()
+    hub = SnapshotHub(dashboard)
+    client = hub.connect()
+    client.get_nowait()  # initial full snapshot
+    hub.tick()
+    dashboard.value = 2
+    hub.tick()
+    client.get_nowait()
+    delta = client.get_nowait()
+    assert b'"b": 2' in delta and b'"a"' not in delta
+
+def test_io_rates_come_from_counter_deltas(monkeypatch):
+    import dashboard_server
+
+    class Empty:
+        def snapshot(self):
+            return {}
+
+    totals = iter([{"network": 1000, "disk": 0}, {"network": 4000, "disk": 512}])
+    clock = iter([100.0, 102.0])
+    monkeypatch.setattr(dashboard_server, "io_totals", lambda: next(totals))
+    monkeypatch.setattr(dashboard_server.time, "monotonic", lambda: next(clock))
+    hub = SnapshotHub(Empty())
+    hub.tick()
+    # No rate until there is a previous reading to compare with
+    assert "network_bytes_per_s" not in hub.state
+    hub.tick()
+    assert hub.state["network_bytes_per_s"] == 1500
+    assert hub.state["disk_bytes_per_s"] == 256
@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+import standins
+
+collector = standins.load_collector()
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+def make_writer(max_writes=500):
+    redis = standins.FakeRedis()
+    # A long window, so only explicit flushes and the size threshold write anything
+    return redis, collector.RedisWriteBehind(redis, flush_interval_ms=60000, max_writes=max_writes)
+
+def test_last_write_wins_within_a_flush_window():
+    coalesced = sample("collector_redis_coalesced_writes_total")
+    redis, writer = make_writer()
+    writer.setex("sensor_data:a", 300, "1")
+    writer.setex("sensor_data:a", 300, "2")
+    writer.setex("sensor_data:b", 300, "3")
+    writer.lpush("alerts", "x")
+    writer.lpush("alerts", "y")
+    assert redis.commands == 0
+    writer.flush()
+    assert redis.get("sensor_data:a") == "2"
+    assert redis.get("sensor_data:b") == "3"
+    assert redis.lists["alerts"] == ["y", "x"]
+    # One round trip, with the superseded write never sent
+    assert (redis.commands, redis.round_trips) == (4, 1)
+    assert sample("collector_redis_coalesced_writes_total") - coalesced == 1
+
+def test_size_threshold_triggers_a_flush():
+    redis, writer = make_writer(max_writes=10)
+    for i in range(9):
+        writer.setex(f"key:{i}", 300, str(i))
+    time.sleep(0.05)
+    assert redis.commands == 0
+    writer.setex("key:9", 300, "9")
+    deadline = time.monotonic() + 2
+    while redis.commands < 10 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert (redis.commands, redis.round_trips) == (10, 1)
+
+def test_flush_records_latency_and_batch_size():
+    flushes = sample("collector_redis_flush_seconds_count")
+    commands = sample("collector_redis_flush_commands_sum")
+    small = sample("collector_redis_flush_commands_bucket", {"le": "5.0"})
+    redis, writer = make_writer()
+    for i in range(3):
+        writer.setex(f"key:{i}", 300, "v")
+    writer.flush()
+    # An empty flush is not a round trip and is not observed
+    writer.flush()
+    assert redis.round_trips == 1
+    assert sample("collector_redis_flush_seconds_count") - flushes == 1
+    assert sample("collector_redis_flush_commands_sum") - commands == 3
+    assert sample("collector_redis_flush_commands_bucket", {"le": "5.0"}) - small == 1
+
+def test_deadband_ignores_counters_and_timestamps():
+    deadband = collector.DeadbandFilter(abs_threshold=0.5, heartbeat_s=60)
+    assert deadband.passes("sensors/temperature/a", {"temperature": 20.0, "seq": 1, "ts": 100}, now=0)
+    assert not deadband.passes("sensors/temperature/a", {"temperature": 20.2, "seq": 2, "ts": 101}, now=1)
+    assert deadband.passes("sensors/temperature/a", {"temperature": 21.0, "seq": 3, "ts": 102}, now=2)
+    # The heartbeat still stores an unchanged reading
+    assert deadband.passes("sensors/temperature/a", {"temperature": 21.0, "seq": 4, "ts": 200}, now=70)
+
+def test_deadband_fields_can_be_overridden_per_topic():
+    deadband = collector.DeadbandFilter(abs_threshold=0.5, overrides={"energy/meter/": {"fields": ["kwh"]}})
+    assert deadband.passes("energy/meter/a", {"kwh": 1.0, "power": 10}, now=0)
+    assert not deadband.passes("energy/meter/a", {"kwh": 1.1, "power": 900}, now=1)
+    # Without any value field there is nothing to compare, so the reading passes
+    assert deadband.passes("energy/meter/a", {"status": "ok"}, now=2)
+
+def test_stop_writes_what_is_still_buffered():
+    redis, writer = make_writer()
+    writer.setex("sensor_data:a", 300, "1")
+    writer.lpush("alerts", "x")
+    writer.stop()
+    assert (redis.commands, redis.round_trips) == (2, 1)
+    assert not writer.thread.is_alive()
+
+def test_collector_shutdown_flushes_buffered_writes():
+    service = collector.IoTDataCollector()
+    service.redis_writer.stop()
+    # A long window, so nothing is written before shutdown
+    service.redis_writer = collector.RedisWriteBehind(service.redis_client, flush_interval_ms=60000)
+    thread = standins.start_collector(service)
+    service.redis_writer.lpush("alerts", "overheat")
+    standins.stop_collector(service, thread)
+    assert service.redis_client.lists["alerts"] == ["overheat"]
+
+def window_stats(store, topic):
+    row = store.rows[topic]
+    count = store.counts[row]
+    return store.means[row], store.m2[row] / count
+
+def test_window_statistics_slide_and_restart_when_a_row_is_reused():
+    rng = np.random.default_rng(0)
+    store = collector.SensorWindowStore(window=8, max_devices=2)
+    readings = {"a": rng.normal(20, 3, 30), "b": rng.normal(50, 10, 30), "c": rng.normal(-5, 1, 12)}
+    for a, b in zip(readings["a"], readings["b"]):
+        store.append("a", a)
+        store.append("b", b)
+    for topic in ("a", "b"):
+        recent = readings[topic][-8:]
+        assert window_stats(store, topic) == pytest.approx((recent.mean(), recent.var()))
+    # "b" is touched again, so the new device takes over the row "a" held
+    store.append("b", readings["b"][-1])
+    row = store.rows["a"]
+    for value in readings["c"][:3]:
+        store.append("c", value)
+    assert "a" not in store and store.rows["c"] == row
+    assert window_stats(store, "c") == pytest.approx((readings["c"][:3].mean(), readings["c"][:3].var()))
+    kept, features = store.features_batch(["a", "c"], min_readings=3)
+    assert kept == ["c"]
+    # Nothing from the evicted device leaks into the unfilled slots
+    assert features[0, :5].tolist() == [0.0] * 5
+    for value in readings["c"][3:]:
+        store.append("c", value)
+    recent = readings["c"][-8:]
+    assert window_stats(store, "c") == pytest.approx((recent.mean(), recent.var()))
+    _, features = store.features_batch(["c"], min_readings=8)
+    np.testing.assert_allclose(features[0], (recent - recent.mean()) / recent.std(), rtol=1e-5, atol=1e-6)
+
+def test_gate_forwards_warmup_and_outliers_but_not_steady_readings():
+    gate = collector.AnomalyGate(z_threshold=3.0, alpha=0.1, sample_rate=0.0, warmup=20)
+    rng = np.random.default_rng(0)
+    noise = rng.normal(20, 0.5, 200).clip(19, 21)
+    assert all(gate.check("sensors/temperature/a", value) for value in noise[:20])
+    assert not any(gate.check("sensors/temperature/a", value) for value in noise[20:])
+    assert gate.check("sensors/temperature/a", 40.0)
+    # A new sensor starts its own warmup rather than judging against another's band
+    assert gate.check("sensors/temperature/b", 40.0)
+    assert gate.stats() == {"warmup": 21, "outlier": 1, "sampled": 0, "suppressed": 180, "forwarded": 22}
+
+def test_gate_samples_a_share_of_normal_readings():
+    gate = collector.AnomalyGate(z_threshold=100.0, sample_rate=0.25, warmup=5)
+    gate.random.seed(1)
+    forwarded = sum(gate.check("sensors/pressure/a", 1000.0 + i % 3) for i in range(4005))
+    assert gate.counts["outlier"] == 0
+    assert forwarded - 5 == gate.counts["sampled"]
+    assert 800 < gate.counts["sampled"] < 1200
@@ -0,0 +1,114 @@
+import calendar
+
+import pytest
+
+from energy_ledger import EnergyLedger
+
+# Half a minute before midnight UTC at the end of January
+MONTH_END = calendar.timegm((2024, 1, 31, 23, 59, 30))
+START = calendar.timegm((2024, 1, 15, 12, 0, 0))
+
+def kwh(power_w, seconds):
+    return power_w * seconds / 3.6e6
+
+def test_interval_is_split_at_the_minute_boundary():
+    ledger = EnergyLedger()
+    ledger.record("generation", 3600, START + 30)
+    assert ledger.record("generation", 3600, START + 90) == pytest.approx(kwh(3600, 60))
+    [(key, closed)] = ledger.closed("minute")
+    assert key == (START + 30) // 60
+    assert closed["generation"] == pytest.approx(kwh(3600, 30))
+    assert ledger.energy("generation", "minute", START + 90) == pytest.approx(kwh(3600, 30))
+    assert ledger.energy("generation", "hour", START + 90) == pytest.approx(kwh(3600, 60))
+
+def test_ramp_is_split_at_the_interpolated_power():
+    ledger = EnergyLedger()
+    ledger.record("generation", 0, START + 30)
+    ledger.record("generation", 1200, START + 90)
+    # 600 W at the boundary: a 0-600 W ramp, then a 600-1200 W ramp
+    assert ledger.closed("minute")[0][1]["generation"] == pytest.approx(kwh(300, 30))
+    assert ledger.energy("generation", "minute", START + 90) == pytest.approx(kwh(900, 30))
+
+def test_month_end_rolls_over_every_period():
+    ledger = EnergyLedger()
+    ledger.record("generation", 1000, MONTH_END)
+    ledger.record("generation", 1000, MONTH_END + 60)
+    half = kwh(1000, 30)
+    now = MONTH_END + 60
+    assert ledger.closed("month") == [((2024, 1), {"generation": pytest.approx(half), "consumption": 0.0,
+                                                   "battery_in": 0.0, "battery_out": 0.0})]
+    assert ledger.closed("day")[0][0] == (MONTH_END // 86400)
+    assert ledger.closed("hour")[0][1]["generation"] == pytest.approx(half)
+    for period in ("minute", "hour", "day", "month"):
+        assert ledger.energy("generation", period, now) == pytest.approx(half)
+    assert ledger.energy("generation", None) == pytest.approx(2 * half)
+
+def test_year_end_rolls_the_month_key_over_the_year():
+    new_year = calendar.timegm((2024, 1, 1, 0, 0, 0))
+    ledger = EnergyLedger()
+    ledger.record("generation", 1000, new_year - 30)
+    ledger.record("generation", 1000, new_year + 30)
+    assert ledger.closed("month")[0][0] == (2023, 12)
+    assert ledger.keys[3] == (2024, 1)
+
+def test_utc_offset_moves_local_midnight():
+    # 23:00 UTC is midnight at UTC+1, but still the same day in UTC
+    eleven_pm = calendar.timegm((2024, 1, 15, 23, 0, 0))
+    utc = EnergyLedger()
+    local = EnergyLedger(utc_offset_s=3600)
+    for ledger in (utc, local):
+        ledger.record("generation", 1000, eleven_pm - 30)
+        ledger.record("generation", 1000, eleven_pm + 30)
+    now = eleven_pm + 30
+    assert utc.closed("day") == []
+    assert utc.energy("generation", "day", now) == pytest.approx(kwh(1000, 60))
+    assert len(local.closed("day")) == 1
+    assert local.energy("generation", "day", now) == pytest.approx(kwh(1000, 30))
+    # Minute and hour buckets still line up with UTC for whole-hour offsets
+    assert local.closed("hour")[0][1]["generation"] == pytest.approx(kwh(1000, 30))
+
+def test_late_channel_credits_the_closed_bucket():
+    ledger = EnergyLedger()
+    ledger.record("consumption", 600, START + 10)
+    ledger.record("generation", 600, START + 10)
+    # Generation moves on to the next minute first
+    ledger.record("generation", 600, START + 70)
+    ledger.record("consumption", 600, START + 50)
+    [(key, closed)] = ledger.closed("minute")
+    assert key == START // 60
+    assert closed["consumption"] == pytest.approx(kwh(600, 40))
+    assert ledger.energy("consumption", "minute", START + 70) == 0.0
+    assert ledger.energy("consumption", "hour", START + 70) == pytest.approx(kwh(600, 40))
+
+def test_gap_longer_than_max_gap_is_not_integrated():
+    ledger = EnergyLedger(max_gap_s=60)
+    ledger.record("generation", 1000, START)
+    assert ledger.record("generation", 1000, START + 61) == 0.0
+    assert ledger.gaps == 1
+    # Integration resumes from the sample after the gap
+    assert ledger.record("generation", 1000, START + 71) == pytest.approx(kwh(1000, 10))
+    assert ledger.energy("generation", None) == pytest.approx(kwh(1000, 10))
+
+def test_repeated_and_older_samples_add_nothing():
+    ledger = EnergyLedger()
+    ledger.record("generation", 1000, START + 10)
+    assert ledger.record("generation", 5000, START + 10) == 0.0
+    assert ledger.out_of_order == 0
+    assert ledger.record("generation", 5000, START + 5) == 0.0
+    assert ledger.out_of_order == 1
+    assert ledger.record("generation", 1000, START + 20) == pytest.approx(kwh(1000, 10))
+
+def test_added_energy_is_spread_over_its_window():
+    ledger = EnergyLedger()
+    ledger.add("generation", kwh(3600, 60), START + 90, start=START + 30)
+    assert ledger.closed("minute")[0][1]["generation"] == pytest.approx(kwh(3600, 30))
+    assert ledger.energy("generation", "minute", START + 90) == pytest.approx(kwh(3600, 30))
+    assert ledger.carbon_kg("hour", START + 90) == pytest.approx(kwh(3600, 60) * ledger.carbon_kg_per_kwh)
+
+def test_energy_is_zero_once_the_period_has_passed():
+    ledger = EnergyLedger()
+    ledger.record("generation", 1000, MONTH_END - 60)
+    ledger.record("generation", 1000, MONTH_END)
+    assert ledger.energy("generation", "day", MONTH_END) == pytest.approx(kwh(1000, 60))
+    assert ledger.energy("generation", "day", MONTH_END + 60) == 0.0
+    assert ledger.energy("generation", "month", MONTH_END + 60) == 0.0
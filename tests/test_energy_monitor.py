@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+import pytest
+
+import standins
+
+energy = standins.load_energy_monitor()
+
+def make_monitor():
+    return energy.EnergyMonitor(backend=energy.SimulatedADC(seed=0))
+
+def test_energy_covers_the_wall_clock_time_since_the_last_update():
+    monitor = make_monitor()
+    # The sampler delivered one block (50 ms) over an interval that really lasted 30 s
+    monitor.last_update = time.time() - 30
+    monitor.engine.step()
+    monitor.update_metrics()
+    generated = monitor.ledger.energy("generation", None)
+    consumed = monitor.ledger.energy("consumption", None)
+    assert generated == pytest.approx(monitor.latest["solar_power_w"] * 30 / 3.6e6, rel=1e-3)
+    assert consumed == pytest.approx(monitor.latest["consumption_w"] * 30 / 3.6e6, rel=1e-3)
+
+def test_first_update_without_a_running_sampler_covers_the_samples_taken():
+    monitor = make_monitor()
+    monitor.update_metrics()
+    window = len(monitor.engine.block) / monitor.engine.rate_hz
+    assert monitor.ledger.energy("generation", None) == pytest.approx(
+        monitor.latest["solar_power_w"] * window / 3.6e6)
+
+def test_consecutive_updates_do_not_overlap():
+    monitor = make_monitor()
+    monitor.last_update = time.time() - 30
+    monitor.update_metrics()
+    first = monitor.ledger.energy("generation", None)
+    monitor.last_update -= 10
+    monitor.update_metrics()
+    # The second update only adds the ~10 s since the first one
+    assert monitor.ledger.energy("generation", None) - first == pytest.approx(
+        monitor.latest["solar_power_w"] * 10 / 3.6e6, rel=1e-2)
+
+def test_spi_adc_reads_every_channel_of_a_sample_in_one_transfer(monkeypatch):
+    monkeypatch.setattr(energy.fcntl, "ioctl", standins.spi_ioctl)
+    adc = energy.SpiADC()
+    out = np.empty((20, adc.channels), dtype=np.uint16)
+    adc.read_block(out, 0)
+    adc.read_block(out, 0)
+    spi = adc.spi
+    assert spi.messages == 40
+    # Chip select is released between channels, so each one is its own conversion
+    assert spi.cs_cycles == 40 * adc.channels
+    for channel in range(adc.channels):
+        assert out[:, channel].tolist() == spi.counts[channel][20:]
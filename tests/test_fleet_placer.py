@@ -0,0 +1,80 @@
+from fleet_placer import FleetPlacer
+
+def test_task_reaches_a_node_below_many_cpu_bound_ones():
+    placer = FleetPlacer()
+    for i in range(40):
+        placer.update_node(f"busy-{i}", battery_kwh=100, cpu_capacity=1)
+        placer.place(f"filler-{i}", 0.1, cpu=1)
+    placer.update_node("spare", battery_kwh=5, cpu_capacity=1)
+    assert placer.place("task", 1, cpu=0.5) == "spare"
+    assert "task" not in placer.unplaced
+
+def test_partly_busy_nodes_are_walked_past():
+    placer = FleetPlacer()
+    for i in range(40):
+        placer.update_node(f"busy-{i}", battery_kwh=100, cpu_capacity=1)
+        placer.place(f"filler-{i}", 0.1, cpu=0.75)
+    placer.update_node("spare", battery_kwh=5, cpu_capacity=1)
+    assert placer.place("task", 1, cpu=0.5) == "spare"
+
+def test_zero_cpu_task_still_uses_the_node_with_most_energy():
+    placer = FleetPlacer()
+    placer.update_node("full", battery_kwh=100, cpu_capacity=1)
+    placer.place("filler", 0.1, cpu=1)
+    placer.update_node("spare", battery_kwh=5, cpu_capacity=1)
+    assert placer.place("task", 1, cpu=0) == "full"
+
+def test_task_no_node_can_run_is_kept_unplaced():
+    placer = FleetPlacer()
+    placer.update_node("small", battery_kwh=1, cpu_capacity=1)
+    assert placer.place("task", 2, cpu=0.5) is None
+    assert placer.unplaced == {"task": (2, 0.5, 1)}
+    # More energy on the node lets the waiting task in
+    assert placer.update_node("small", battery_kwh=3) == [("task", None, "small")]
+    assert placer.unplaced == {}
+
+def test_power_loss_moves_the_lowest_priority_tasks_first():
+    placer = FleetPlacer(horizon_hours=0)
+    placer.update_node("a", battery_kwh=10, cpu_capacity=4)
+    for task_id, energy, priority in (("critical", 3, 3), ("small", 1, 0), ("large", 2, 0), ("normal", 2, 1)):
+        placer.place(task_id, energy, cpu=0.5, priority=priority)
+    placer.update_node("b", battery_kwh=4, cpu_capacity=4)
+    # 8 kWh committed on a node that now holds 5; the two priority-0 tasks free enough, largest first
+    moves = placer.update_node("a", battery_kwh=5)
+    assert sorted(moves) == [("large", "a", "b"), ("small", "a", "b")]
+    assert set(placer.nodes["a"].tasks) == {"critical", "normal"}
+    assert placer.available_kwh(placer.nodes["a"]) == 0
+    assert placer.placements["large"] == placer.placements["small"] == "b"
+
+def test_tasks_with_nowhere_to_go_are_kept_unplaced_after_a_rebalance():
+    placer = FleetPlacer(horizon_hours=0)
+    placer.update_node("a", battery_kwh=10)
+    placer.place("high", 4, priority=2)
+    placer.place("low", 4, priority=0)
+    placer.update_node("b", battery_kwh=1)
+    assert placer.update_node("a", battery_kwh=5) == [("low", "a", None)]
+    assert placer.unplaced == {"low": (4, 0.0, 0)}
+    assert placer.update_node("b", battery_kwh=6) == [("low", None, "b")]
+
+def test_removed_node_hands_its_tasks_to_the_rest_of_the_fleet():
+    placer = FleetPlacer(horizon_hours=0)
+    placer.update_node("a", battery_kwh=10, cpu_capacity=2)
+    placer.place("x", 3, cpu=1)
+    placer.place("y", 2, cpu=1)
+    placer.update_node("b", battery_kwh=4, cpu_capacity=1)
+    placer.update_node("c", battery_kwh=3, cpu_capacity=1)
+    moves = placer.remove_node("a")
+    assert sorted(moves) == [("x", "a", "b"), ("y", "a", "c")]
+    assert "a" not in placer.nodes
+    assert sorted(name for _, name in placer.index + placer.saturated) == ["b", "c"]
+
+def test_completed_task_frees_its_energy_and_cpu():
+    placer = FleetPlacer(horizon_hours=0)
+    placer.update_node("a", battery_kwh=5, cpu_capacity=1)
+    placer.place("x", 4, cpu=1)
+    assert placer.place("y", 2, cpu=0.5) is None
+    placer.complete("x")
+    node = placer.nodes["a"]
+    assert (node.committed_kwh, node.committed_cpu) == (0, 0)
+    assert "x" not in placer.placements and placer.saturated == []
+    assert placer.place("y", 2, cpu=0.5) == "a"
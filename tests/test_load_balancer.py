@@ -0,0 +1,192 @@
+import pytest
+
+from battery_manager import BatteryManager
+from event_bus import EventBus, MetricsSink
+from load_balancer import LoadBalancer, Task
+
+NOW = 1_700_000_000.0
+
+class NoSurplusYet:
+    """Forecast with a surplus an hour away, so deferrable work is held back"""
+
+    def in_surplus(self, now):
+        return False
+
+    def next_surplus(self, now, latest_start):
+        return now + 3600 if now + 3600 <= latest_start else None
+
+class SurplusAt:
+    """Forecast whose next surplus starts at a fixed time; counts the lookups"""
+
+    def __init__(self, start):
+        self.start = start
+        self.lookups = 0
+
+    def in_surplus(self, now):
+        return now >= self.start
+
+    def next_surplus(self, now, latest_start):
+        self.lookups += 1
+        return self.start if self.start <= latest_start else None
+
+def balancer(charge_kwh=10, capacity_kwh=10, forecast=None):
+    events = EventBus()
+    metrics = MetricsSink()
+    events.subscribe(metrics)
+    battery = BatteryManager(capacity_kwh, events=events)
+    battery.charge_level = charge_kwh
+    return LoadBalancer(battery, forecast=forecast, events=events), metrics
+
+def test_tick_admits_in_priority_order():
+    lb, _ = balancer(charge_kwh=2.5)
+    low = lb.submit(Task(1, 1, 'low'))
+    high = lb.submit(Task(1, 1, 'high'))
+    normal = lb.submit(Task(1, 1, 'normal'))
+    admitted, _ = lb.tick(NOW)
+    assert admitted == [high, normal]
+    assert low.state == 'pending' and lb.pending == 1
+
+def test_held_back_tasks_do_not_block_runnable_work():
+    lb, _ = balancer(forecast=NoSurplusYet())
+    for _ in range(200):
+        lb.submit(Task(0.01, 1, 'critical', deadline=NOW + 4 * 3600))
+    runnable = lb.submit(Task(1, 1, 'low', deferrable=False))
+    admitted, _ = lb.tick(NOW)
+    assert admitted == [runnable]
+    assert lb.pending == 200
+
+def test_oversized_tasks_do_not_block_smaller_ones():
+    lb, _ = balancer(charge_kwh=3)
+    for _ in range(200):
+        lb.submit(Task(5, 1, 'high'))
+    small = lb.submit(Task(1, 1, 'normal'))
+    admitted, _ = lb.tick(NOW)
+    assert admitted == [small]
+
+def test_tasks_larger_than_the_battery_are_rejected():
+    lb, _ = balancer()
+    assert not lb.schedule_task(20, 1, deferrable=True)
+    queued = lb.submit(Task(20, 1, 'normal'))
+    lb.tick(NOW)
+    assert queued.state == 'rejected'
+    assert lb.stats() == {"pending": 0, "admitted": 0, "missed": 0, "rejected": 2}
+    assert not lb.queue
+
+def test_missed_deadlines_are_dropped_from_the_queue():
+    lb, _ = balancer(charge_kwh=0.5)
+    late = lb.submit(Task(1, 1, 'normal', deadline=NOW + 1800))
+    later = lb.submit(Task(1, 1, 'normal', deadline=NOW + 7200))
+    admitted, missed = lb.tick(NOW)
+    assert (admitted, missed) == ([], [late])
+    assert late.state == 'missed'
+    lb.battery_manager.charge_level = 10
+    admitted, missed = lb.tick(NOW)
+    assert (admitted, missed) == ([later], [])
+    assert lb.pending == 0 and not lb.queue
+
+def test_reserve_holds_back_only_lower_priorities():
+    lb, _ = balancer(charge_kwh=1)
+    normal = lb.submit(Task(0.5, 1, 'normal'))
+    high = lb.submit(Task(0.5, 1, 'high'))
+    admitted, _ = lb.tick(NOW)
+    assert admitted == [high]
+    assert normal.state == 'pending'
+
+def test_every_rejection_is_published():
+    lb, metrics = balancer(charge_kwh=0.5)
+    lb.schedule_task(1, 1, 'normal')                      # below the reserve
+    lb.schedule_task(20, 1, 'normal')                     # larger than the battery
+    lb.submit(Task(1, 1, 'high', deferrable=False))       # queued, does not fit the charge
+    lb.tick(NOW)
+    lb.events.flush()
+    assert metrics.counts["TaskRejected"] == 3
+
+class RejectionRecorder:
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event):
+        if type(event).__name__ == "TaskRejected":
+            self.events.append(event)
+
+    def flush(self):
+        pass
+
+def rejections(lb):
+    return lb.events.subscribe(RejectionRecorder())
+
+def test_immediate_rejections_are_counted_and_published():
+    lb, _ = balancer(charge_kwh=0.5)
+    recorder = rejections(lb)
+    assert not lb.schedule_task(0.5, 1, 'normal')         # below the reserve
+    lb.battery_manager.charge_level = 2
+    assert not lb.schedule_task(3, 1, 'normal')           # above the reserve, but more than the charge
+    lb.events.flush()
+    assert [(e.load_kw, e.reason) for e in recorder.events] == [(0.5, 'low_battery'), (3, 'insufficient_energy')]
+    assert lb.stats()["rejected"] == 2
+    assert lb.pending == 0 and not lb.queue
+
+def test_deferrable_task_that_does_not_fit_is_queued_not_rejected():
+    lb, metrics = balancer(charge_kwh=2)
+    assert not lb.schedule_task(3, 1, 'normal', deferrable=True)
+    lb.events.flush()
+    assert lb.pending == 1 and lb.rejected == 0
+    assert metrics.counts.get("TaskRejected", 0) == 0
+
+def test_console_shows_the_rejection_reason():
+    import io
+    from event_bus import ConsoleSink, TaskRejected
+
+    stream = io.StringIO()
+    ConsoleSink(stream).handle(TaskRejected(NOW, 2, 0.5, 'normal', 'insufficient_energy'))
+    assert "insufficient energy" in stream.getvalue()
+
+def test_unknown_priority_is_a_clear_error():
+    lb, _ = balancer()
+    with pytest.raises(ValueError, match="Unknown priority 'urgent'"):
+        lb.schedule_task(1, 1, 'urgent')
+    assert lb.stats() == {"pending": 0, "admitted": 0, "missed": 0, "rejected": 0}
+
+def test_parked_tasks_are_not_revisited_until_they_can_run():
+    forecast = SurplusAt(NOW + 3600)
+    lb, _ = balancer(charge_kwh=3, forecast=forecast)
+    for _ in range(100):
+        lb.submit(Task(0.01, 1, 'normal', deadline=NOW + 4 * 3600))
+    for _ in range(100):
+        # Due before the surplus, so they wait for charge instead
+        lb.submit(Task(5, 1, 'normal', deadline=NOW + 5400))
+    lb.tick(NOW)
+    assert (len(lb.held), len(lb.waiting), lb.queue) == (100, 100, [])
+    lookups = forecast.lookups
+    assert lb.tick(NOW + 60) == ([], [])
+    assert forecast.lookups == lookups
+
+def test_held_tasks_run_once_the_surplus_starts():
+    lb, _ = balancer(forecast=SurplusAt(NOW + 3600))
+    held = [lb.submit(Task(0.5, 1, 'normal', deadline=NOW + 4 * 3600)) for _ in range(3)]
+    assert lb.tick(NOW) == ([], [])
+    admitted, _ = lb.tick(NOW + 3600)
+    assert admitted == held
+    assert lb.pending == 0 and not lb.held
+
+def test_waiting_tasks_run_once_the_battery_charges():
+    lb, _ = balancer(charge_kwh=3)
+    small = lb.submit(Task(4, 1, 'normal'))
+    large = lb.submit(Task(6, 1, 'low'))
+    assert lb.tick(NOW) == ([], [])
+    lb.battery_manager.charge_level = 5
+    assert lb.tick(NOW)[0] == [small]
+    assert large in [entry[1][3] for entry in lb.waiting]
+    lb.battery_manager.charge_level = 10
+    assert lb.tick(NOW)[0] == [large]
+    assert lb.pending == 0 and not lb.waiting
+
+def test_missed_deadlines_are_dropped_from_the_parked_tasks():
+    lb, _ = balancer(charge_kwh=3)
+    task = lb.submit(Task(5, 1, 'normal', deadline=NOW + 7200))
+    lb.tick(NOW)
+    _, missed = lb.tick(NOW + 7200)
+    assert missed == [task]
+    lb.battery_manager.charge_level = 10
+    assert lb.tick(NOW + 7200) == ([], [])
+    assert lb.stats()["admitted"] == 0 and not lb.waiting
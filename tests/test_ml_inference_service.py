@@ -0,0 +1,136 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import standins
+
+ml = standins.load_ml_service("model")
+
+class EchoService:
+    def predict_batch(self, batch):
+        return [{"rows": len(batch), "first": row[0]} for row in batch]
+
+class SlowService:
+    def predict_batch(self, batch):
+        time.sleep(0.5)
+        return [{} for _ in batch]
+
+def test_batcher_groups_vectors_by_length():
+    batcher = ml.MicroBatcher(EchoService(), max_wait_ms=20, workers=1)
+    results = {}
+
+    def call(vector):
+        results[tuple(vector)] = batcher.submit(vector)
+
+    threads = [threading.Thread(target=call, args=(v,)) for v in ([1, 2], [3, 4], [5, 6, 7])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results[(5, 6, 7)]["first"] == 5
+    assert results[(1, 2)]["first"] == 1
+
+def test_batcher_survives_unbatchable_input():
+    batcher = ml.MicroBatcher(EchoService(), workers=1)
+    assert "error" in batcher.submit(5, timeout=2)
+    # The worker is still serving
+    assert batcher.submit([1.0, 2.0], timeout=2)["first"] == 1.0
+    assert all(worker.is_alive() for worker in batcher.workers)
+
+def test_batcher_times_out():
+    batcher = ml.MicroBatcher(SlowService(), workers=1)
+    with pytest.raises(TimeoutError):
+        batcher.submit([1.0], timeout=0.05)
+
+@pytest.mark.parametrize("body", [{"sensor_data": 5}, {"sensor_data": []}, {"sensor_data": [1, "x"]},
+                                  {"sensor_data": [True]}, [1, 2], {}])
+def test_predict_rejects_malformed_sensor_data(body):
+    response = ml.app.test_client().post("/predict", json=body)
+    assert response.status_code == 400
+
+def test_predict_scores_a_vector():
+    response = ml.app.test_client().post("/predict", json={"sensor_data": [1, 2, 3, 4], "bypass_cache": True})
+    assert response.status_code == 200
+    assert 0 <= response.get_json()["anomaly_score"] <= 1
+
+def test_predict_returns_503_when_no_result_arrives(monkeypatch):
+    def submit(sensor_data):
+        raise TimeoutError("No inference result within 0 s")
+    monkeypatch.setattr(ml.batcher, "submit", submit)
+    response = ml.app.test_client().post("/predict", json={"sensor_data": [1, 2], "bypass_cache": True})
+    assert response.status_code == 503
+
+def tensor(rows, cols):
+    return standins.TENSOR_HEADER.pack(rows, cols) + np.ones((rows, cols), dtype='<f4').tobytes()
+
+@pytest.mark.parametrize("body", [{"sensor_data": 5}, {"sensor_data": []}, {"sensor_data": [[]]},
+                                  {"sensor_data": [1, 2]}, {"sensor_data": [[1, 2], [3]]},
+                                  {"sensor_data": [[1, "x"]]}, {"sensor_data": [[None]]}, [[1, 2]], {}])
+def test_predict_batch_rejects_malformed_sensor_data(body):
+    response = ml.app.test_client().post("/predict_batch", json=body)
+    assert response.status_code == 400
+
+def test_predict_batch_rejects_invalid_json():
+    response = ml.app.test_client().post("/predict_batch", data=b"{not json", content_type="application/json")
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("payload", [tensor(0, 4), tensor(3, 0), tensor(2, 4)[:-4], b"\x01"])
+def test_predict_batch_rejects_malformed_tensors(payload):
+    response = ml.app.test_client().post("/predict_batch", data=payload, content_type="application/octet-stream")
+    assert response.status_code == 400
+
+def test_predict_batch_scores_json_and_tensor_rows():
+    client = ml.app.test_client()
+    response = client.post("/predict_batch", json={"sensor_data": [[1, 2, 3], [4, 5, 6]], "bypass_cache": True})
+    assert response.status_code == 200
+    assert len(response.get_json()["results"]) == 2
+    response = client.post("/predict_batch?bypass_cache=1", data=tensor(3, 4), content_type="application/octet-stream")
+    assert response.status_code == 200
+    assert len(response.get_json()["results"]) == 3
+
+def test_changing_batch_sizes_do_not_reallocate():
+    interpreter = ml.PooledInterpreter("model.tflite", 1)
+    rows = np.random.default_rng(0).normal(size=(32, 16)).astype(np.float32)
+    reference = {n: interpreter.run(rows[:n]).copy() for n in (1, 2, 4, 8, 16, 32)}
+    allocations = interpreter.allocations
+    for n in np.random.default_rng(1).integers(1, 33, 200).tolist():
+        output = interpreter.run(rows[:n])
+        assert output.shape == (n, 1)
+        # Padding rows never change the scores of the real ones
+        np.testing.assert_allclose(output, reference[ml.padded_rows(n)][:n], rtol=1e-6)
+    # Every size is served by one of the six power-of-two interpreters
+    assert interpreter.allocations == allocations
+    assert [ml.padded_rows(n) for n in (1, 2, 3, 5, 17, 32, 33)] == [1, 2, 4, 8, 32, 32, 64]
+
+def test_cache_keys_readings_by_their_rounded_value():
+    cache = ml.InferenceCache(precision=2)
+    assert cache.key([1.001, -0.001]) == cache.key([1.004, 0.0])
+    assert cache.key([1.001]) != cache.key([1.01])
+    cache.put(cache.key([20.001, 3.0]), {"prediction": 0.5})
+    assert cache.get(cache.key([20.0, 3.004]))["prediction"] == 0.5
+    assert cache.get(cache.key([20.0, 3.01])) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_evicts_the_least_recently_used_entry():
+    cache = ml.InferenceCache(max_entries=2)
+    for name in ("a", "b"):
+        cache.put(name, {"prediction": name})
+    # Reading "a" makes "b" the oldest
+    assert cache.get("a")["cached"] is True
+    cache.put("c", {"prediction": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a")["prediction"] == "a"
+    assert cache.get("c")["prediction"] == "c"
+    assert cache.stats()["entries"] == 2 and cache.evictions == 1
+
+def test_cache_drops_expired_entries_and_skips_errors():
+    cache = ml.InferenceCache(ttl_seconds=0.2)
+    cache.put("a", {"prediction": 1})
+    cache.put("failed", {"error": "model unavailable"})
+    assert cache.get("a")["prediction"] == 1
+    assert cache.get("failed") is None
+    time.sleep(0.3)
+    assert cache.get("a") is None
+    assert cache.expirations == 1 and cache.stats()["entries"] == 0
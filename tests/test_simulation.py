@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from simulation import simulate_power, step_reference
+
+STEP = 60
+
+def random_trace(seed, steps=3000):
+    rng = np.random.default_rng(seed)
+    # Stretches of darkness, weak sun and strong sun, so the battery both drains and clips
+    regime = np.repeat(rng.integers(0, 3, steps // 50), 50)
+    power = np.select([regime == 0, regime == 1],
+                      [0.0, rng.uniform(0, 300, steps)], rng.uniform(1000, 4000, steps))
+    load = np.where(rng.random(steps) < 0.2, 0.0, rng.uniform(0.1, 1.5, steps))
+    high = rng.random(steps) < 0.3
+    return power, load, high
+
+@pytest.mark.parametrize("seed", range(10))
+def test_vectorized_run_matches_the_classes_bit_for_bit(seed):
+    power, load, high = random_trace(seed)
+    result = simulate_power(power, load, STEP, capacity_kwh=2, initial_kwh=1, high_priority=high)
+    soc, accepted = step_reference(power, load, STEP, capacity_kwh=2, initial_kwh=1, high_priority=high)
+    # The trace has to reach every regime for the comparison to mean anything
+    assert (result.absorbed_kwh < result.generated_kwh).any()
+    assert result.soc_kwh.min() <= 1
+    assert np.diff(result.accepted.astype(int)).any()
+    assert result.rejected.any()
+    assert np.array_equal(result.soc_kwh, soc)
+    assert np.array_equal(result.accepted, accepted)
+    assert np.array_equal(result.rejected, (load > 0) & ~accepted)
+
+def test_long_steady_stretches_match_the_classes():
+    # Slow drain and slow recharge take the cumulative-sum path through several chunk doublings
+    rng = np.random.default_rng(7)
+    steps = 40000
+    power = np.where((np.arange(steps) // 10000) % 2 == 0, 0.0, 600.0) + rng.uniform(0, 5, steps)
+    load = rng.uniform(0.05, 0.07, steps)
+    result = simulate_power(power, load, STEP, capacity_kwh=10, initial_kwh=9)
+    soc, accepted = step_reference(power, load, STEP, capacity_kwh=10, initial_kwh=9)
+    assert result.rejected.any() and (result.absorbed_kwh < result.generated_kwh).any()
+    assert np.array_equal(result.soc_kwh, soc)
+    assert np.array_equal(result.accepted, accepted)